@@ -5,10 +5,10 @@ from scipy.io import wavfile
 from os import makedirs, listdir
 from os.path import exists, split
 from shutil import copy
-from json import dump, JSONEncoder
 import numpy as np
 
 from clips import Clips
+from param_recorder import DEFAULT_FORMAT, ParameterRecorder
 
 from audio_augmenters import (
     aggressive_augmenter,
@@ -17,17 +17,13 @@ from audio_augmenters import (
 )
 
 
-class NumpyEncoder(JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, np.float32):
-            return float(obj)
-        return super().default(obj)
-
-
 def augment_clips(
-    augmenter: GeneralAugmentation, clips_input_dir, output_dir, repeat: int, **kwargs
+    augmenter: GeneralAugmentation,
+    clips_input_dir,
+    output_dir,
+    repeat: int,
+    parameters_format: str = DEFAULT_FORMAT,
+    **kwargs
 ):
     clips = Clips(
         input_directory=clips_input_dir,
@@ -39,10 +35,15 @@ def augment_clips(
     )
     clip_generator = clips.audio_generator(repeat=repeat, **kwargs)
 
+    # applied parameters are streamed to disk in chunks, or not collected at all
+    recorder = None
+    augmenter.record_parameters = parameters_format != "none"
+    if augmenter.record_parameters:
+        recorder = ParameterRecorder(f"{output_dir}/applied_parameters_per_clip.{parameters_format}")
+
     augmented_generator = augmenter.augment_generator(clip_generator)
 
     augmented_file_count = 0
-    all_clips_with_parameters = []
     for augmented_clip_data, path_data in tqdm(
         augmented_generator, leave=False, desc="Augmenting clips"
     ):
@@ -51,18 +52,16 @@ def augment_clips(
         augmented_file_path = f"{output_dir}/augmented_{augmented_file_count}.wav"
         wavfile.write(augmented_file_path, 16000, augmented_clip)
         augmented_file_count += 1
-        all_clips_with_parameters.append(
-            {
-                "path": augmented_file_path,
-                "source_path": path_data,
-                "parameters": applied_parameters,
-            }
-        )
-    dump(
-        all_clips_with_parameters,
-        open(f"{output_dir}/applied_parameters_per_clip.json", "w+"),
-        cls=NumpyEncoder,
-    )
+        if recorder is not None:
+            recorder.record(
+                applied_parameters,
+                path=augmented_file_path,
+                source_path=path_data[0],
+                repetition=path_data[1],
+            )
+
+    if recorder is not None:
+        recorder.close()
 
 
 p = ArgumentParser()
@@ -70,6 +69,12 @@ p.add_argument("clips_folder")
 p.add_argument("out_folder")
 p.add_argument("--repeat", required=False, default=1, type=int)
 p.add_argument("--include-originals", required=False, default=False, type=bool)
+p.add_argument(
+    "--parameters-format",
+    required=False,
+    default=DEFAULT_FORMAT,
+    choices=["parquet", "jsonl", "none"],
+)
 
 from random import uniform
 
@@ -133,7 +138,7 @@ if __name__ == "__main__":
     # augment audio files in the folder
     # augmenter = aggressive_augmenter()
     augmenter = custom_augmenter_test(apply_amplitude_modulation)
-    augment_clips(augmenter, clips_folder, out_folder, rep)
+    augment_clips(augmenter, clips_folder, out_folder, rep, args.parameters_format)
 
     # include originals
     if include_originals:
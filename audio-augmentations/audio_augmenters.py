@@ -1,7 +1,7 @@
 from augmentation import Augmentation
 from general_augmentation import GeneralAugmentation
 
-from .composed_effects import aggressive, aggressive_no_noise, custom
+from composed_effects import aggressive, aggressive_no_noise, custom
 
 
 def default_augmenter(
@@ -32,11 +32,11 @@ def default_augmenter(
     )
 
 
-def aggressive_augmenter():
-    augmenter = aggressive()
+def aggressive_augmenter(augmentation_duration_s=3.2):
+    augmenter = aggressive(augmentation_duration_s)
     return GeneralAugmentation(
         augment=augmenter,
-        augmentation_duration_s=3.2,
+        augmentation_duration_s=augmentation_duration_s,
         min_jitter_s=0.195,
         max_jitter_s=0.205,
     )
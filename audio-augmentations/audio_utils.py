@@ -13,8 +13,47 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import warnings
+
 import numpy as np
-import webrtcvad
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+
+# one webrtcvad.Vad per thread (and so per worker process), created on first use
+_vad_storage = threading.local()
+
+
+def get_vad(mode: int = 0):
+    """Returns the webrtcvad.Vad of the calling thread for the given aggressiveness mode, creating it once."""
+    vads = getattr(_vad_storage, "vads", None)
+    if vads is None:
+        vads = _vad_storage.vads = {}
+    if mode not in vads:
+        vads[mode] = webrtcvad.Vad(mode)
+    return vads[mode]
+
+
+def _frames(audio_data: np.ndarray, step_size: int, min_start: int) -> np.ndarray:
+    # the frames after min_start, as a (frames, step_size) view on the last axis. The last
+    # frame is never included, the same as stepping range(min_start, length - step_size, step_size)
+    length = audio_data.shape[-1]
+    n_frames = max(-(-(length - step_size - min_start) // step_size), 0)
+    stop = min_start + n_frames * step_size
+    return audio_data[..., min_start:stop].reshape(audio_data.shape[:-1] + (n_frames, step_size))
+
+
+def _keep_frames(audio_data: np.ndarray, frames: np.ndarray, mask: np.ndarray, min_start: int) -> np.ndarray:
+    # the first min_start samples followed by the kept frames, gathered in one go
+    out = np.empty(min(min_start, audio_data.shape[0]) + int(mask.sum()) * frames.shape[1], dtype=audio_data.dtype)
+    out[:min_start] = audio_data[:min_start]
+    out[min_start:] = frames[mask].ravel()
+    return out
 
 
 def remove_silence_webrtc(
@@ -34,28 +73,117 @@ def remove_silence_webrtc(
     Returns:
         numpy.ndarray: Array with the trimmed audio clip's samples.
     """
-    vad = webrtcvad.Vad(0)
+    vad = get_vad(0)
 
     # webrtcvad expects int16 arrays as input, so convert if audio_data is a float
     float_type = audio_data.dtype in (np.float32, np.float64)
     if float_type:
         audio_data = (audio_data * 32767).astype(np.int16)
-
-    filtered_audio = audio_data[0:min_start].tolist()
+    else:
+        audio_data = audio_data.astype(np.int16, copy=False)
 
     step_size = int(sample_rate * frame_duration)
-
-    for i in range(min_start, audio_data.shape[0] - step_size, step_size):
-        vad_detected = vad.is_speech(
-            audio_data[i : i + step_size].tobytes(), sample_rate
-        )
-        if vad_detected:
-            # If voice activity is detected, add it to filtered_audio
-            filtered_audio.extend(audio_data[i : i + step_size].tolist())
+    frames = _frames(audio_data, step_size, min_start)
+    mask = np.fromiter(
+        (vad.is_speech(frame.tobytes(), sample_rate) for frame in frames),
+        dtype=bool,
+        count=len(frames),
+    )
+    filtered_audio = _keep_frames(audio_data, frames, mask, min_start)
 
     # If the original audio data was a float array, convert back
     if float_type:
-        trimmed_audio = np.array(filtered_audio)
-        return np.array(trimmed_audio / 32767).astype(np.float32)
+        return (filtered_audio / 32767).astype(np.float32)
+
+    return filtered_audio
+
+
+def energy_vad_mask(
+    audio_data: np.ndarray,
+    frame_duration: float = 0.030,
+    sample_rate: int = 16000,
+    min_start: int = 2000,
+    energy_threshold_db: float = -35.0,
+    zcr_threshold: float = 0.25,
+) -> np.ndarray:
+    """Pure NumPy voice activity detection from the energy and zero-crossing rate of each frame.
+
+    A frame is voice if its RMS is above `energy_threshold_db`, or if it is at most 10 dB below it with a zero-crossing rate above `zcr_threshold` (unvoiced speech is quieter and noisier). Frames are laid out as in `remove_silence_webrtc`. Works on a single clip or on a (batch, samples) array at once.
+
+    Args:
+        audio_data (numpy.ndarray): Float audio samples in [-1, 1], of shape (samples,) or (batch, samples).
+        frame_duration (float): The frame duration in seconds. Defaults to 0.03.
+        sample_rate (int): The audio's sample rate. Defaults to 16000.
+        min_start: (int): The number of audio samples from the start of the clip that are not analyzed. Defaults to 2000.
+        energy_threshold_db (float): RMS level (in dBFS) above which a frame is voice. Defaults to -35.
+        zcr_threshold (float): Fraction of sign changes per sample above which a quieter frame is still voice. Defaults to 0.25.
+
+    Returns:
+        numpy.ndarray: Boolean array of shape (frames,) or (batch, frames), true for voice frames.
+    """
+    step_size = int(sample_rate * frame_duration)
+    frames = _frames(np.asarray(audio_data, dtype=np.float32), step_size, min_start)
+
+    power = np.einsum("...i,...i->...", frames, frames) / step_size
+    energy_db = 10 * np.log10(np.maximum(power, 1e-12))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[..., 1:] != signs[..., :-1], axis=-1) / step_size
+
+    return (energy_db > energy_threshold_db) | (
+        (energy_db > energy_threshold_db - 10) & (zcr > zcr_threshold)
+    )
+
+
+def remove_silence_energy(
+    audio_data: np.ndarray,
+    frame_duration: float = 0.030,
+    sample_rate: int = 16000,
+    min_start: int = 2000,
+    energy_threshold_db: float = -35.0,
+    zcr_threshold: float = 0.25,
+):
+    """Removes silence like `remove_silence_webrtc`, with the NumPy `energy_vad_mask` instead of webrtcvad.
+
+    Args:
+        audio_data (numpy.ndarray): Float audio samples in [-1, 1], of shape (samples,) or (batch, samples).
+        frame_duration (float): The frame duration in seconds. Defaults to 0.03.
+        sample_rate (int): The audio's sample rate. Defaults to 16000.
+        min_start: (int): The number of audio samples from the start of the clip to always include. Defaults to 2000.
+        energy_threshold_db (float): See `energy_vad_mask`. Defaults to -35.
+        zcr_threshold (float): See `energy_vad_mask`. Defaults to 0.25.
 
-    return np.array(filtered_audio).astype(np.int16)
+    Returns:
+        numpy.ndarray | list: Array with the trimmed audio clip's samples, or a list of them for a batch.
+    """
+    step_size = int(sample_rate * frame_duration)
+    mask = energy_vad_mask(audio_data, frame_duration, sample_rate, min_start, energy_threshold_db, zcr_threshold)
+    frames = _frames(audio_data, step_size, min_start)
+    if audio_data.ndim == 1:
+        return _keep_frames(audio_data, frames, mask, min_start)
+
+    # one gather for the whole batch, then split into the rows
+    kept = frames[mask].reshape(-1)
+    rows = np.split(kept, np.cumsum(mask.sum(axis=1))[:-1] * step_size)
+    head = audio_data[:, :min_start]
+    return [np.concatenate([head[i], row]) for i, row in enumerate(rows)]
+
+
+def select_remove_silence(remove_silence: bool = True):
+    """Returns the silence removal function: `remove_silence_webrtc` when webrtcvad is installed, otherwise `remove_silence_energy`.
+
+    The energy detector segments clips differently from webrtcvad, so falling back to it is warned about when silence removal is enabled.
+
+    Args:
+        remove_silence (bool): Whether silence removal is enabled. Defaults to True.
+
+    Returns:
+        Callable: The silence removal function.
+    """
+    if WEBRTCVAD_AVAILABLE:
+        return remove_silence_webrtc
+    if remove_silence:
+        warnings.warn(
+            "webrtcvad is not installed, silence is removed with the NumPy energy / zero-crossing detector instead,"
+            " which segments clips differently. Install webrtcvad to use it."
+        )
+    return remove_silence_energy
@@ -20,6 +20,17 @@ import numpy as np
 
 from typing import List
 
+from background_noise import AddBankedBackgroundNoise
+from batch_augmentation import BatchAugmenter
+from clip_assembly import assemble_clip
+from param_recorder import collect_parameters
+from reverb import ApplyPrecomputedImpulseResponse
+
+
+def identity_transform(samples, sample_rate):
+    # module level, so that the augmentation can be pickled to worker processes
+    return samples
+
 
 class Augmentation:
     """A class that handles applying augmentations to audio clips.
@@ -38,6 +49,8 @@ class Augmentation:
         min_jitter_s (float, optional): The minimum duration in seconds that the original clip is positioned before the end of the augmented audio. Defaults to 0.0.
         max_jitter_s (float, optional): The maximum duration in seconds that the original clip is positioned before the end of the augmented audio. Defaults to 0.0.
         truncate_randomly: (bool, option): If true, the clip is truncated to the specified duration randomly. Otherwise, the start of the clip is truncated.
+        background_cache_dir (str | None, optional): Directory where the background audio is decoded to once, see BackgroundNoiseBank. Defaults to None, a directory in the system's temporary directory.
+        record_parameters (bool, optional): If true, `augment_clip` also returns the parameters applied by every transform. Disable it when they are not logged. Defaults to True.
     """
 
     def __init__(
@@ -67,8 +80,11 @@ class Augmentation:
         min_jitter_s: float = 0.0,
         max_jitter_s: float = 0.0,
         truncate_randomly: bool = False,
+        background_cache_dir: str | None = None,
+        record_parameters: bool = True,
     ):
         self.truncate_randomly = truncate_randomly
+        self.record_parameters = record_parameters
         ############################################
         # Configure audio duration and positioning #
         ############################################
@@ -90,23 +106,28 @@ class Augmentation:
         #######################
 
         # If either the background_paths or impulse_paths are not specified, use an identity transform instead
-        def identity_transform(samples, sample_rate):
-            return samples
-
         background_noise_augment = audiomentations.Lambda(
             transform=identity_transform, p=0.0
         )
         reverb_augment = audiomentations.Lambda(transform=identity_transform, p=0.0)
 
         if len(background_paths):
-            background_noise_augment = audiomentations.AddBackgroundNoise(
+            background_noise_augment = AddBankedBackgroundNoise(
                 p=augmentation_probabilities.get("AddBackgroundNoise", 0.0),
                 sounds_path=background_paths,
                 min_snr_db=background_min_snr_db,
                 max_snr_db=background_max_snr_db,
+                cache_dir=background_cache_dir,
             )
 
-        if len(impulse_paths) > 0:
+        if len(impulse_paths) > 0 and self.augmented_samples is not None:
+            # fixed size clips: impulse response spectra are computed once for their length
+            reverb_augment = ApplyPrecomputedImpulseResponse(
+                p=augmentation_probabilities.get("RIR", 0.0),
+                ir_path=impulse_paths,
+                clip_samples=self.augmented_samples,
+            )
+        elif len(impulse_paths) > 0:
             reverb_augment = audiomentations.ApplyImpulseResponse(
                 p=augmentation_probabilities.get("RIR", 0.0),
                 ir_path=impulse_paths,
@@ -161,6 +182,12 @@ class Augmentation:
             shuffle=False,
         )
 
+    def draw_jitter(self):
+        """Draws a random jitter duration (in samples) between the class's min_jitter_s and max_jitter_s paramters."""
+        if self.min_jitter_samples < self.max_jitter_samples:
+            return np.random.randint(self.min_jitter_samples, self.max_jitter_samples)
+        return self.min_jitter_samples
+
     def add_jitter(self, input_audio: np.ndarray):
         """Pads the clip on the right by a random duration between the class's min_jitter_s and max_jitter_s paramters.
 
@@ -170,46 +197,36 @@ class Augmentation:
         Returns:
             numpy.ndarray: Array of audio samples with silence added to the end.
         """
-        if self.min_jitter_samples < self.max_jitter_samples:
-            jitter_samples = np.random.randint(
-                self.min_jitter_samples, self.max_jitter_samples
-            )
-        else:
-            jitter_samples = self.min_jitter_samples
-
         # Pad audio on the right by jitter samples
-        return np.pad(input_audio, (0, jitter_samples))
+        return assemble_clip(input_audio, jitter_samples=self.draw_jitter())
 
-    def create_fixed_size_clip(self, input_audio: np.ndarray):
+    def create_fixed_size_clip(self, input_audio: np.ndarray, jitter_samples: int = 0):
         """Ensures the input audio clip has a fixced length. If the duration is too long, the start of the clip is removed. If it is too short, the start of the clip is padded with silence.
 
         Args:
             input_audio (numpy.ndarray): Array containing the audio clip's samples.
+            jitter_samples (int, optional): Silence added to the end of the clip first, as `add_jitter` does, in the same output array. Defaults to 0.
 
         Returns:
             numpy.ndarray: Array of audio samples with `augmented_duration_s` length.
         """
-        if self.augmented_samples is None:
+        if self.augmented_samples is None and not jitter_samples:
             return input_audio
 
-        if self.augmented_samples < input_audio.shape[0]:
+        total_samples = input_audio.shape[0] + jitter_samples
+        start = None
+        if self.augmented_samples is not None and self.augmented_samples < total_samples:
             # Truncate the too long audio by removing the start of the clip
             if self.truncate_randomly:
-                random_start = np.random.randint(
-                    0, input_audio.shape[0] - self.augmented_samples
-                )
-                input_audio = input_audio[
-                    random_start : random_start + self.augmented_samples
-                ]
-            else:
-                input_audio = input_audio[-self.augmented_samples :]
-        else:
-            # Pad with zeros at start of too short audio clip
-            left_padding_samples = self.augmented_samples - input_audio.shape[0]
-
-            input_audio = np.pad(input_audio, (left_padding_samples, 0))
-
-        return input_audio
+                start = np.random.randint(0, total_samples - self.augmented_samples)
+
+        # Pad with zeros at start of too short audio clip
+        return assemble_clip(
+            input_audio,
+            jitter_samples=jitter_samples,
+            fixed_samples=self.augmented_samples,
+            start=start,
+        )
 
     # Modified ON 8/07/2025
     def augment_clip(self, input_audio: np.ndarray):
@@ -219,10 +236,10 @@ class Augmentation:
             input_audio (numpy.ndarray): Array containing the audio clip's samples.
 
         Returns:
-            numpy.ndarray: The augmented audio of fixed duration.
+            tuple: The augmented audio of fixed duration, and the parameters applied by every transform (None if `record_parameters` is false).
         """
-        input_audio = self.add_jitter(input_audio)
-        input_audio = self.create_fixed_size_clip(input_audio)
+        # jitter and fixed size in a single allocation
+        input_audio = self.create_fixed_size_clip(input_audio, self.draw_jitter())
 
         with warnings.catch_warnings():
             warnings.simplefilter(
@@ -231,17 +248,10 @@ class Augmentation:
             output_audio = self.augment(input_audio, sample_rate=16000)
 
             # farm applied parameters
-            applied_parameters = []
-            for transform in self.augment.transforms:
-                params = {}
-                if isinstance(transform, audiomentations.OneOf)\
-                    or isinstance(transform, audiomentations.SomeOf):
-                    params = [(tr.__class__.__name__, tr.parameters) for tr in transform.transforms]                        
-                elif 'parameters' in transform.__dir__():
-                    params = transform.parameters
-
-                applied_parameters.append((transform.__class__.__name__, params))
-        
+            applied_parameters = None
+            if self.record_parameters:
+                applied_parameters = collect_parameters(self.augment)
+
         return output_audio, applied_parameters
 
     def augment_generator(self, audio_generator):
@@ -262,3 +272,49 @@ class Augmentation:
             val = self.augment_clip(audio)
             print("RECEIVED VALUE", val)
             yield val, path_data
+
+    def augment_batch(self, input_batch, seed=None):
+        """Augments a batch of clips at once, see `BatchAugmenter`.
+
+        Args:
+            input_batch (numpy.ndarray | list): Array of fixed size clips of shape (batch, samples), or a list of clips of any size, which get jitter and a fixed size first like in `augment_clip`.
+            seed (int | numpy.random.Generator | None, optional): Seed of the batched parameter draws. Defaults to None.
+
+        Returns:
+            tuple: The augmented (batch, samples) array and the applied parameters of every clip.
+        """
+        if isinstance(input_batch, list):
+            input_batch = np.stack(
+                [self.create_fixed_size_clip(clip, self.draw_jitter()) for clip in input_batch]
+            )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return BatchAugmenter(self.augment, sample_rate=16000, seed=seed)(input_batch)
+
+    def augment_batch_generator(self, audio_generator, batch_size: int = 64, seed=None):
+        """Same as `augment_generator`, but clips are augmented `batch_size` at a time with `augment_batch`.
+
+        Args:
+            audio_generator (generator): A Python generator that yields audio clips.
+            batch_size (int, optional): Number of clips augmented together. Defaults to 64.
+            seed (int | None, optional): Seed of the batched parameter draws. Defaults to None.
+
+        Yields:
+            tuple: The augmented audio clip's samples and applied parameters, and the clip's path data.
+        """
+        rng = np.random.default_rng(seed)
+        clips, path_data = [], []
+        for audio, clip_path_data in audio_generator:
+            clips.append(audio)
+            path_data.append(clip_path_data)
+            if len(clips) == batch_size:
+                yield from self._yield_batch(clips, path_data, rng)
+                clips, path_data = [], []
+        if clips:
+            yield from self._yield_batch(clips, path_data, rng)
+
+    def _yield_batch(self, clips, path_data, rng):
+        output_batch, applied_parameters = self.augment_batch(clips, rng)
+        for output_audio, parameters, clip_path_data in zip(output_batch, applied_parameters, path_data):
+            yield (output_audio, parameters), clip_path_data
@@ -0,0 +1,144 @@
+import os
+import random
+import tempfile
+import warnings
+
+import numpy as np
+from numpy.typing import NDArray
+
+from audiomentations.core.transforms_interface import BaseWaveformTransform
+from audiomentations.core.utils import find_audio_files_in_paths
+
+from clip_assembly import tile_into
+from clip_cache import ClipCache
+
+
+class BackgroundNoiseBank:
+    """Background sounds decoded once to mono float32 and memory-mapped.
+
+    The sounds found in the given paths are decoded and resampled to `sample_rate` once, into a ClipCache, and later runs only check their modification times. Every process maps the same file read-only, so the decoded audio lives once in the page cache however many augmentation workers read it, and pickling the bank to a worker does not copy the audio.
+
+    Args:
+        sounds_path (list | str): Audio file(s) and/or folder(s) of audio files, as for `audiomentations.AddBackgroundNoise`.
+        cache_dir (str | None, optional): Directory of the ClipCache. Defaults to a directory in the system's temporary directory.
+        sample_rate (int, optional): Sample rate of the decoded sounds. Defaults to 16000.
+        processes (int | None, optional): Number of worker processes decoding the sounds. Defaults to the number of CPUs.
+    """
+
+    def __init__(
+        self,
+        sounds_path,
+        cache_dir: str | None = None,
+        sample_rate: int = 16000,
+        processes: int | None = None,
+    ):
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), "background_noise_bank")
+        self.paths = [str(path) for path in find_audio_files_in_paths(sounds_path)]
+        if not self.paths:
+            raise ValueError(f"No audio files found in {sounds_path}")
+
+        self.sample_rate = sample_rate
+        self.cache = ClipCache(cache_dir, sample_rate=sample_rate, processes=processes)
+        self.cache.materialise(self.paths)
+        self.lengths = np.array([self.cache.index[path][2] for path in self.paths], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def segment(self, path: str, offset: int, num_samples: int) -> np.ndarray:
+        """Returns up to `num_samples` samples of a sound from `offset` on, as a read-only view of the memory map."""
+        return self.cache[path][offset : offset + num_samples]
+
+
+class AddBankedBackgroundNoise(BaseWaveformTransform):
+    """Mixes in a background sound from a BackgroundNoiseBank, like `audiomentations.AddBackgroundNoise`.
+
+    Parameters are drawn as in audiomentations, from the `random` module, but the noise is a view of the memory-mapped bank instead of a file decoded and resampled on every application, so mixing costs one RMS and one multiply-add. Sounds shorter than the clip are repeated.
+    """
+
+    supports_multichannel = False
+
+    def __init__(
+        self,
+        sounds_path=None,
+        min_snr_db: float = 3.0,
+        max_snr_db: float = 30.0,
+        noise_rms: str = "relative",
+        min_absolute_rms_db: float = -45.0,
+        max_absolute_rms_db: float = -15.0,
+        p: float = 0.5,
+        cache_dir: str | None = None,
+        bank: BackgroundNoiseBank | None = None,
+    ):
+        """
+        :param sounds_path: Audio file(s) and/or folder(s) of audio files, decoded into a new bank
+        :param min_snr_db: Minimum signal-to-noise ratio in dB, used if noise_rms is "relative"
+        :param max_snr_db: Maximum signal-to-noise ratio in dB, used if noise_rms is "relative"
+        :param noise_rms: "relative" to scale the noise to the RMS of the input, "absolute" otherwise
+        :param min_absolute_rms_db: Minimum RMS of the noise in dB, used if noise_rms is "absolute"
+        :param max_absolute_rms_db: Maximum RMS of the noise in dB, used if noise_rms is "absolute"
+        :param p: The probability of applying this transform
+        :param cache_dir: Directory of the bank's cache, see BackgroundNoiseBank
+        :param bank: An existing bank to share, instead of sounds_path
+        """
+        super().__init__(p)
+        if min_snr_db > max_snr_db:
+            raise ValueError("min_snr_db must not be greater than max_snr_db")
+        if min_absolute_rms_db > max_absolute_rms_db:
+            raise ValueError("min_absolute_rms_db must not be greater than max_absolute_rms_db")
+        if max_absolute_rms_db > 0:
+            raise ValueError("max_absolute_rms_db must not be greater than 0")
+        if noise_rms not in ("relative", "absolute"):
+            raise ValueError(f"Unsupported noise_rms {noise_rms}")
+
+        self.bank = bank if bank is not None else BackgroundNoiseBank(sounds_path, cache_dir)
+        self.min_snr_db = min_snr_db
+        self.max_snr_db = max_snr_db
+        self.noise_rms = noise_rms
+        self.min_absolute_rms_db = min_absolute_rms_db
+        self.max_absolute_rms_db = max_absolute_rms_db
+
+    def randomize_parameters(self, samples: NDArray[np.float32], sample_rate: int):
+        super().randomize_parameters(samples, sample_rate)
+        if self.parameters["should_apply"]:
+            self.parameters["snr_db"] = random.uniform(self.min_snr_db, self.max_snr_db)
+            self.parameters["rms_db"] = random.uniform(self.min_absolute_rms_db, self.max_absolute_rms_db)
+
+            file_idx = random.randint(0, len(self.bank) - 1)
+            self.parameters["noise_file_path"] = self.bank.paths[file_idx]
+            max_offset = max(0, int(self.bank.lengths[file_idx]) - len(samples))
+            self.parameters["offset"] = random.randint(0, max_offset) / self.bank.sample_rate
+            self.parameters["duration"] = len(samples) / sample_rate
+
+    def apply(self, samples: NDArray[np.float32], sample_rate: int):
+        if sample_rate != self.bank.sample_rate:
+            raise ValueError(f"The background noise bank holds {self.bank.sample_rate} Hz audio, got {sample_rate} Hz")
+
+        num_samples = len(samples)
+        offset = round(self.parameters["offset"] * sample_rate)
+        noise = self.bank.segment(self.parameters["noise_file_path"], offset, num_samples)
+
+        noise_rms = np.sqrt(np.dot(noise, noise) / len(noise)) if len(noise) else 0.0
+        if noise_rms < 1e-9:
+            warnings.warn(
+                "The file {} is too silent to be added as noise. Returning the input"
+                " unchanged.".format(self.parameters["noise_file_path"])
+            )
+            return samples
+
+        if self.noise_rms == "relative":
+            clean_rms = np.sqrt(np.dot(samples, samples) / num_samples)
+            desired_noise_rms = clean_rms / 10 ** (self.parameters["snr_db"] / 20)
+        else:
+            desired_noise_rms = 10 ** (self.parameters["rms_db"] / 20)
+        gain = desired_noise_rms / noise_rms
+
+        # the noise is scaled straight into the output, then the clip is added in place
+        out = np.empty_like(samples)
+        if len(noise) < num_samples:
+            np.multiply(tile_into(out, noise), gain, out=out)
+        else:
+            np.multiply(noise, gain, out=out)
+        out += samples
+        return out
@@ -0,0 +1,304 @@
+import numpy as np
+from scipy import fft
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
+
+from audiomentations.core.utils import a_weighting_frequency_envelope
+
+from param_recorder import collect_parameters
+
+
+# BATCH TRANSFORMS
+# Each takes the audiomentations transform (only its settings are read), the (batch, samples)
+# float32 array, modified in place, and the mask of the rows the enclosing Compose applies to.
+# Parameters of all rows are drawn at once; the applied parameters of every row are returned.
+def _should_apply(engine, transform, active):
+    return active & (engine.rng.random(active.shape[0]) < transform.p)
+
+
+def _row_parameters(should_apply, **values):
+    # one dict per row, like audiomentations' transform.parameters
+    rows = [{"should_apply": bool(apply)} for apply in should_apply]
+    for i in np.flatnonzero(should_apply):
+        rows[i].update({name: value[i].item() for name, value in values.items()})
+    return rows
+
+
+def _rms(batch):
+    return np.sqrt(np.einsum("ij,ij->i", batch, batch, dtype=np.float64) / batch.shape[1])
+
+
+def batch_gain(engine, transform, batch, active):
+    min_gain_db = getattr(transform, "min_gain_db", None)
+    if min_gain_db is None:
+        min_gain_db, max_gain_db = transform.min_gain_in_db, transform.max_gain_in_db
+    else:
+        max_gain_db = transform.max_gain_db
+
+    should_apply = _should_apply(engine, transform, active)
+    gain_db = engine.rng.uniform(min_gain_db, max_gain_db, active.shape[0])
+    amplitude_ratio = 10 ** (gain_db / 20)
+    batch *= np.where(should_apply, amplitude_ratio, 1.0).astype(np.float32)[:, None]
+    return _row_parameters(should_apply, amplitude_ratio=amplitude_ratio)
+
+
+def batch_normalize(engine, transform, batch, active):
+    should_apply = _should_apply(engine, transform, active)
+    max_amplitude = np.max(np.abs(batch), axis=1)
+    if getattr(transform, "apply_to", "all") == "only_too_loud_sounds":
+        scale = should_apply & (max_amplitude > 1.0)
+    else:
+        scale = should_apply & (max_amplitude > 0.0)
+    batch /= np.where(scale, max_amplitude, 1.0).astype(np.float32)[:, None]
+    return _row_parameters(should_apply, max_amplitude=max_amplitude)
+
+
+def batch_color_noise(engine, transform, batch, active):
+    should_apply = _should_apply(engine, transform, active)
+    snr_db = engine.rng.uniform(transform.min_snr_db, transform.max_snr_db, active.shape[0])
+    f_decay = engine.rng.uniform(transform.min_f_decay, transform.max_f_decay, active.shape[0])
+    apply_a_weighting = engine.rng.random(active.shape[0]) < getattr(transform, "p_apply_a_weighting", 0.0)
+
+    rows = np.flatnonzero(should_apply)
+    n_samples = batch.shape[1]
+    frequencies = fft.rfftfreq(n_samples, 1 / engine.sample_rate)
+    frequencies[0] = frequencies[1]
+    weighting = None
+    if apply_a_weighting[rows].any():
+        weighting = a_weighting_frequency_envelope(n_samples, engine.sample_rate)
+    for chunk in np.array_split(rows, max(1, -(-len(rows) // engine.chunk_rows))):
+        if not len(chunk):
+            continue
+        # white noise shaped in the frequency domain: f_decay dB per octave, A-weighted for some rows
+        white = engine.rng.standard_normal((len(chunk), n_samples), dtype=np.float32)
+        slope = f_decay[chunk, None] / (20 * np.log10(2))
+        envelope = frequencies**slope
+        if weighting is not None:
+            envelope = np.where(apply_a_weighting[chunk, None], envelope * weighting, envelope)
+        noise = fft.irfft(fft.rfft(white, axis=1) * envelope, n=n_samples, axis=1)
+        noise_rms = _rms(noise)
+        noise_rms[noise_rms == 0] = 1.0
+        gain = _rms(batch[chunk]) / 10 ** (snr_db[chunk] / 20) / noise_rms
+        batch[chunk] += (noise * gain[:, None]).astype(np.float32)
+
+    return _row_parameters(should_apply, snr_db=snr_db, f_decay=f_decay, apply_a_weighting=apply_a_weighting)
+
+
+def _mel(frequency):
+    return 2595 * np.log10(1 + frequency / 700)
+
+
+def _mel_to_frequency(mel):
+    return 700 * (10 ** (mel / 2595) - 1)
+
+
+def _butterworth_band(btype):
+    def batch_filter(engine, transform, batch, active):
+        should_apply = _should_apply(engine, transform, active)
+        n_rows = active.shape[0]
+        zero_phase = getattr(transform, "zero_phase", False)
+        # as BaseButterworthFilter: zero phase filters run twice, so their order steps are 12 dB
+        step = 12 if zero_phase else 6
+        rolloff = step * engine.rng.integers(
+            transform.min_rolloff // step, transform.max_rolloff // step, n_rows, endpoint=True
+        )
+        center_freq = _mel_to_frequency(
+            engine.rng.uniform(_mel(transform.min_center_freq), _mel(transform.max_center_freq), n_rows)
+        )
+        bandwidth = center_freq * engine.rng.uniform(
+            transform.min_bandwidth_fraction, transform.max_bandwidth_fraction, n_rows
+        )
+
+        low = center_freq - bandwidth / 2
+        high = np.minimum(center_freq + bandwidth / 2, engine.sample_rate // 2 * 0.9999)
+        rows = np.flatnonzero(should_apply)
+        sos = [
+            butter(rolloff[i] // step, [low[i], high[i]], btype=btype, output="sos", fs=engine.sample_rate)
+            for i in rows
+        ]
+        engine.filter_rows(batch, rows, sos, zero_phase=zero_phase)
+        return _row_parameters(should_apply, center_freq=center_freq, bandwidth=bandwidth, rolloff=rolloff)
+
+    return batch_filter
+
+
+def _rbj_biquads(kind, center_freq, gain_db, q, sample_rate):
+    # RBJ audio EQ cookbook biquads, vectorized over rows: returns (rows, 6) sos sections
+    a = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * center_freq / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+    if kind == "peak":
+        b = [1 + alpha * a, -2 * cos_w0, 1 - alpha * a]
+        den = [1 + alpha / a, -2 * cos_w0, 1 - alpha / a]
+    else:
+        sign = 1 if kind == "low_shelf" else -1
+        root = 2 * np.sqrt(a) * alpha
+        b = [
+            a * ((a + 1) - sign * (a - 1) * cos_w0 + root),
+            sign * 2 * a * ((a - 1) - sign * (a + 1) * cos_w0),
+            a * ((a + 1) - sign * (a - 1) * cos_w0 - root),
+        ]
+        den = [
+            (a + 1) + sign * (a - 1) * cos_w0 + root,
+            -sign * 2 * ((a - 1) + sign * (a + 1) * cos_w0),
+            (a + 1) + sign * (a - 1) * cos_w0 - root,
+        ]
+    sections = np.stack(np.broadcast_arrays(*b, *den), axis=-1)
+    return sections / sections[:, 3:4]
+
+
+def batch_seven_band_eq(engine, transform, batch, active):
+    should_apply = _should_apply(engine, transform, active)
+    n_rows = active.shape[0]
+    # the band filters of the transform hold the ranges: low shelf, five peaks, high shelf
+    bands = (
+        [("low_shelf", transform.low_shelf_filter)]
+        + [("peak", band) for band in transform.peaking_filters]
+        + [("high_shelf", transform.high_shelf_filter)]
+    )
+    center_freq = np.stack(
+        [
+            _mel_to_frequency(engine.rng.uniform(_mel(band.min_center_freq), _mel(band.max_center_freq), n_rows))
+            for _, band in bands
+        ],
+        axis=1,
+    )
+    gain_db = np.stack([engine.rng.uniform(band.min_gain_db, band.max_gain_db, n_rows) for _, band in bands], axis=1)
+    q_factor = np.stack([engine.rng.uniform(band.min_q, band.max_q, n_rows) for _, band in bands], axis=1)
+
+    rows = np.flatnonzero(should_apply)
+    nyquist = engine.sample_rate // 2
+    sections = []
+    for i, (kind, _) in enumerate(bands):
+        band_center_freq = center_freq[rows, i]
+        if kind != "peak":
+            band_center_freq = np.where(band_center_freq > nyquist, nyquist * 0.9999, band_center_freq)
+        sections.append(_rbj_biquads(kind, band_center_freq, gain_db[rows, i], q_factor[rows, i], engine.sample_rate))
+    sos = np.stack(sections, axis=1)
+    engine.filter_rows(batch, rows, sos)
+
+    rows_parameters = _row_parameters(should_apply)
+    for i in rows:
+        rows_parameters[i].update(
+            center_freq=center_freq[i].tolist(), gain_db=gain_db[i].tolist(), q_factor=q_factor[i].tolist()
+        )
+    return rows_parameters
+
+
+def batch_impulse_response(engine, transform, batch, active):
+    should_apply = _should_apply(engine, transform, active)
+    spectra = transform.spectra
+    indices = engine.rng.integers(0, len(spectra), active.shape[0])
+
+    rows = np.flatnonzero(should_apply)
+    if not transform.leave_length_unchanged:
+        raise ValueError("ApplyPrecomputedImpulseResponse changes the clip length, batches need fixed size clips")
+    for chunk in np.array_split(rows, max(1, -(-len(rows) // engine.chunk_rows))):
+        if len(chunk):
+            batch[chunk] = spectra.convolve_batch(batch[chunk], indices[chunk])
+
+    rows_parameters = _row_parameters(should_apply)
+    for i in rows:
+        rows_parameters[i]["ir_file_path"] = spectra.paths[indices[i]]
+    return rows_parameters
+
+
+BATCH_TRANSFORMS = {
+    "Gain": batch_gain,
+    "Normalize": batch_normalize,
+    "AddColorNoise": batch_color_noise,
+    "BandPassFilter": _butterworth_band("bandpass"),
+    "BandStopFilter": _butterworth_band("bandstop"),
+    "SevenBandParametricEQ": batch_seven_band_eq,
+    "ApplyPrecomputedImpulseResponse": batch_impulse_response,
+}
+
+
+class BatchAugmenter:
+    """Applies an audiomentations Compose to a (batch, samples) array of fixed size clips at once.
+
+    Transforms listed in BATCH_TRANSFORMS (gain, color noise, band filters, seven band EQ, precomputed impulse responses and normalize) draw the parameters of all rows in one vectorized call and process the whole batch together. Their parameter distributions follow the audiomentations ones, but the random streams differ, so results match audiomentations statistically, not sample by sample. Every other transform falls back to being called row by row.
+
+    Args:
+        augment (audiomentations.Compose): The augmentation chain.
+        sample_rate (int, optional): Sample rate of the clips. Defaults to 16000.
+        seed (int | numpy.random.Generator | None, optional): Seed of the batched parameter draws. Defaults to None.
+        chunk_rows (int, optional): Number of rows of noise generated or reverberated at a time, bounds the memory of the FFT buffers. Defaults to 32.
+    """
+
+    def __init__(self, augment, sample_rate: int = 16000, seed=None, chunk_rows: int = 32):
+        self.augment = augment
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(seed)
+        self.chunk_rows = chunk_rows
+
+    def __call__(self, input_batch: np.ndarray):
+        """Augments every row of the batch.
+
+        Args:
+            input_batch (numpy.ndarray): Array of shape (batch, samples).
+
+        Returns:
+            tuple: The augmented (batch, samples) float32 array, and the applied parameters of every row, in the format of `augment_clip`.
+        """
+        batch = np.array(input_batch, dtype=np.float32, order="C")
+        parameters = [[] for _ in range(batch.shape[0])]
+        self._apply(self.augment, batch, np.ones(batch.shape[0], dtype=bool), parameters)
+        return batch, parameters
+
+    def _apply(self, compose, batch, active, parameters):
+        active = active & (self.rng.random(batch.shape[0]) < getattr(compose, "p", 1.0))
+        if getattr(compose, "shuffle", False):
+            # the order changes per call: no batching possible
+            for i in np.flatnonzero(active):
+                batch[i] = self._call_row(compose, batch[i])
+                parameters[i].extend(collect_parameters(compose))
+            return
+
+        for transform in compose.transforms:
+            name = transform.__class__.__name__
+            if name == "Compose":
+                rows_parameters = [[] for _ in parameters]
+                self._apply(transform, batch, active, rows_parameters)
+            elif name in BATCH_TRANSFORMS:
+                rows_parameters = BATCH_TRANSFORMS[name](self, transform, batch, active)
+            else:
+                rows_parameters = self._fallback(transform, batch, active)
+
+            for row_parameters, row_applied in zip(rows_parameters, parameters):
+                row_applied.append((name, row_parameters))
+
+    def _call_row(self, transform, row):
+        out = transform(row, sample_rate=self.sample_rate)
+        if out.shape != row.shape:
+            raise ValueError(f"{transform.__class__.__name__} changed the clip length, batches need fixed size clips")
+        return out
+
+    def _fallback(self, transform, batch, active):
+        rows_parameters = [{}] * batch.shape[0]
+        for i in np.flatnonzero(active):
+            batch[i] = self._call_row(transform, batch[i])
+            if hasattr(transform, "transforms"):
+                # OneOf, SomeOf
+                rows_parameters[i] = collect_parameters(transform)
+            elif hasattr(transform, "parameters"):
+                rows_parameters[i] = dict(transform.parameters)
+        return rows_parameters
+
+    def filter_rows(self, batch, rows, sos, zero_phase: bool = False):
+        """Filters the given rows of the batch in place, each with its own second-order sections.
+
+        Args:
+            batch (numpy.ndarray): Array of shape (batch, samples).
+            rows (numpy.ndarray): Indices of the rows to filter.
+            sos (numpy.ndarray | list): Second-order sections of every filtered row.
+            zero_phase (bool, optional): Filter forward and backward, like audiomentations' zero_phase. Defaults to False.
+        """
+        # Coefficients differ per row, so each row is one sosfilt call: it runs in C and is
+        # about ten times faster than applying the frequency responses of the rows with FFTs
+        for row, row_sos in zip(rows, sos):
+            if zero_phase:
+                batch[row] = sosfiltfilt(row_sos, batch[row])
+            else:
+                # started in the steady state of the first sample, as audiomentations does
+                batch[row], _ = sosfilt(row_sos, batch[row], zi=sosfilt_zi(row_sos) * batch[row, 0])
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+def tile_into(out: np.ndarray, source: np.ndarray, offset: int = 0) -> np.ndarray:
+    """Fills `out` with the source repeated periodically, starting at `offset` in the source.
+
+    Equivalent to `np.resize(np.roll(source, -offset), len(out))` without any temporary array: after the first period, the already written periods are copied forward in doubling blocks.
+
+    Args:
+        out (numpy.ndarray): The array to fill.
+        source (numpy.ndarray): The period to repeat, not empty.
+        offset (int, optional): Index in the source of the first sample written. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The filled `out` array.
+    """
+    period = source.shape[0]
+    total = out.shape[0]
+    offset %= period
+
+    filled = min(period - offset, total)
+    out[:filled] = source[offset : offset + filled]
+    if filled == total:
+        return out
+
+    # out[aligned:filled] always holds whole periods starting at source[0]
+    aligned = filled
+    count = min(period, total - filled)
+    out[filled : filled + count] = source[:count]
+    filled += count
+    while filled < total:
+        count = min(filled - aligned, total - filled)
+        out[filled : filled + count] = out[aligned : aligned + count]
+        filled += count
+    return out
+
+
+def repeat_clip(audio_samples: np.ndarray, min_samples: int) -> np.ndarray:
+    """Repeats the clip a whole number of times until it is at least `min_samples` long, in a single allocation.
+
+    Args:
+        audio_samples (numpy.ndarray): Original audio clip's samples.
+        min_samples (int): The minimum number of samples of the result.
+
+    Returns:
+        numpy.ndarray: The repeated clip, or the original one if it is already long enough (or empty).
+    """
+    length = audio_samples.shape[0]
+    if length == 0 or length >= min_samples:
+        return audio_samples
+    repeats = -(-min_samples // length)
+    return np.tile(audio_samples, repeats)
+
+
+def assemble_clip(
+    audio_samples: np.ndarray,
+    min_samples: int = 0,
+    jitter_samples: int = 0,
+    fixed_samples: int | None = None,
+    start: int | None = None,
+) -> np.ndarray:
+    """Builds a clip from the source samples in one preallocated array.
+
+    The result is the same as repeating the clip whole times up to `min_samples`, padding it on the right with `jitter_samples` zeros and then fitting it to `fixed_samples`: a too long clip is truncated to the window beginning at `start` (its end if None), a too short one is padded with zeros on the left. Only the output array is allocated, whatever the number of repetitions.
+
+    Args:
+        audio_samples (numpy.ndarray): Source audio clip's samples.
+        min_samples (int, optional): Repeat the clip until it is at least this long. Defaults to 0.
+        jitter_samples (int, optional): Number of zeros added to the end of the repeated clip. Defaults to 0.
+        fixed_samples (int | None, optional): Length of the result. Set to None to keep the full length. Defaults to None.
+        start (int | None, optional): Start of the kept window when truncating. Defaults to None.
+
+    Returns:
+        numpy.ndarray: The assembled clip.
+    """
+    length = audio_samples.shape[0]
+    repeated = length * max(-(-min_samples // length), 1) if length else 0
+    total = repeated + jitter_samples
+
+    if fixed_samples is None:
+        fixed_samples = total
+    if fixed_samples < total:
+        if start is None:
+            start = total - fixed_samples
+        left_padding = 0
+    else:
+        start = 0
+        left_padding = fixed_samples - total
+
+    out = np.zeros(fixed_samples, dtype=audio_samples.dtype)
+    # the window [start, start + fixed_samples) of the padded clip lands after the left padding
+    stop = min(start + fixed_samples - left_padding, repeated)
+    if stop > start:
+        tile_into(out[left_padding : left_padding + stop - start], audio_samples, start)
+    return out
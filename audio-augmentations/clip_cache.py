@@ -0,0 +1,225 @@
+import fcntl
+import hashlib
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+
+def decode_clip(path: str, sample_rate: int = 16000, quality: str = "HQ") -> np.ndarray:
+    """Decodes an audio file to mono float32 at the given sample rate.
+
+    Matches what `datasets.Audio(sampling_rate=sample_rate)` returns: channels are averaged and the
+    audio is resampled with soxr at the same quality as librosa's default `soxr_hq`.
+
+    Args:
+        path (str): Path to the audio file.
+        sample_rate (int, optional): Target sample rate. Defaults to 16000.
+        quality (str, optional): soxr resampling quality. Defaults to "HQ".
+
+    Returns:
+        numpy.ndarray: Array with the clip's samples.
+    """
+    audio, file_sample_rate = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if file_sample_rate != sample_rate:
+        audio = soxr.resample(audio, file_sample_rate, sample_rate, quality=quality)
+    return audio.astype(np.float32, copy=False)
+
+
+def _decode_clip(arguments):
+    return decode_clip(*arguments)
+
+
+class ClipCache:
+    """Pre-decoded store of audio clips, resampled once and memory-mapped.
+
+    Clips are decoded, resampled and appended back to back to a single raw file, with a sqlite
+    index of offsets keyed by source path and modification time. Retrieving a clip is then a
+    zero-copy slice of the memory map, however many times it is read. A separate store is kept
+    for every combination of sample rate, dtype and resampling quality.
+
+    Several processes can fill the same store: appends and index updates happen under a file
+    lock. Clips re-decoded because their source changed leave their old samples behind; once
+    they take more room than the live clips, the store is compacted into a new blob file.
+
+    Args:
+        cache_dir (str): Directory of the stores.
+        sample_rate (int, optional): Sample rate of the stored clips. Defaults to 16000.
+        dtype (str, optional): "float32", or "int16" to halve the size of the store. Defaults to "float32".
+        quality (str, optional): soxr resampling quality. Defaults to "HQ".
+        processes (int | None, optional): Number of worker processes decoding clips. Defaults to the number of CPUs.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        sample_rate: int = 16000,
+        dtype: str = "float32",
+        quality: str = "HQ",
+        processes: int | None = None,
+    ):
+        if dtype not in ("float32", "int16"):
+            raise ValueError(f"Unsupported cache dtype {dtype}")
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.quality = quality
+        self.processes = processes
+
+        settings = f"{sample_rate}-{dtype}-{quality}"
+        self.store_dir = os.path.join(cache_dir, hashlib.sha1(settings.encode()).hexdigest()[:16])
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.index_path = os.path.join(self.store_dir, "index.sqlite")
+        self.lock_path = os.path.join(self.store_dir, "lock")
+
+        with self._locked(), sqlite3.connect(self.index_path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS clips (path TEXT PRIMARY KEY, mtime_ns INTEGER, offset INTEGER, length INTEGER)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            connection.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+        self._load_index()
+
+    @property
+    def blob_path(self) -> str:
+        # every compaction writes a new generation of the blob
+        if self.generation == 0:
+            return os.path.join(self.store_dir, f"clips.{self.dtype.name}")
+        return os.path.join(self.store_dir, f"clips.{self.generation}.{self.dtype.name}")
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        with sqlite3.connect(self.index_path) as connection:
+            (self.generation,) = connection.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+            self.index = {
+                path: (mtime_ns, offset, length)
+                for path, mtime_ns, offset, length in connection.execute("SELECT * FROM clips")
+            }
+        self._blob = None
+
+    def _stale(self, paths: list) -> list:
+        stale = []
+        for path in paths:
+            mtime_ns = os.stat(path).st_mtime_ns
+            entry = self.index.get(path)
+            if entry is None or entry[0] != mtime_ns:
+                stale.append((path, mtime_ns))
+        return stale
+
+    def materialise(self, paths: list):
+        """Decodes and stores the clips that are not in the cache yet, or changed since.
+
+        Args:
+            paths (list): Paths to the audio files.
+        """
+        if not self._stale(paths):
+            return
+
+        with self._locked():
+            # other processes may have stored some of the clips, or compacted the store, meanwhile
+            self._load_index()
+            stale = self._stale(paths)
+            if not stale:
+                return
+
+            rows = []
+            arguments = [(path, self.sample_rate, self.quality) for path, _ in stale]
+            blob = os.open(self.blob_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+            try:
+                offset = os.fstat(blob).st_size // self.dtype.itemsize
+                with ProcessPoolExecutor(self.processes) as executor:
+                    for (path, mtime_ns), audio in zip(stale, executor.map(_decode_clip, arguments, chunksize=16)):
+                        if self.dtype == np.int16:
+                            audio = np.round(np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+                        os.write(blob, audio.tobytes())
+                        rows.append((path, mtime_ns, offset, len(audio)))
+                        offset += len(audio)
+            finally:
+                os.close(blob)
+
+            # the index is updated once the data is on disk
+            with sqlite3.connect(self.index_path) as connection:
+                connection.executemany("INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?)", rows)
+            self._load_index()
+
+            live = sum(length for _, _, length in self.index.values())
+            if offset - live > live:
+                self._compact()
+
+    def compact(self):
+        """Rewrites the store without the samples of superseded clips."""
+        with self._locked():
+            self._load_index()
+            self._compact()
+
+    def _compact(self):
+        # called with the lock held and a fresh index
+        old_path = self.blob_path
+        # no blob (nothing stored yet) or an empty one (only empty clips): there is nothing to map
+        has_samples = os.path.exists(old_path) and os.path.getsize(old_path) > 0
+        old_blob = np.memmap(old_path, dtype=self.dtype, mode="r") if has_samples else None
+
+        rows, offset = [], 0
+        fd, scratch = tempfile.mkstemp(suffix=".tmp", dir=self.store_dir)
+        with os.fdopen(fd, "wb") as blob:
+            for path, (mtime_ns, old_offset, length) in sorted(self.index.items(), key=lambda item: item[1][1]):
+                if length:
+                    blob.write(old_blob[old_offset : old_offset + length].tobytes())
+                rows.append((path, mtime_ns, offset, length))
+                offset += length
+        del old_blob
+
+        generation = self.generation + 1
+        os.replace(scratch, os.path.join(self.store_dir, f"clips.{generation}.{self.dtype.name}"))
+        with sqlite3.connect(self.index_path) as connection:
+            connection.execute("DELETE FROM clips")
+            connection.executemany("INSERT INTO clips VALUES (?, ?, ?, ?)", rows)
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (generation,))
+        # processes that mapped the old blob keep reading it until they unmap it
+        if os.path.exists(old_path):
+            os.remove(old_path)
+        self._load_index()
+
+    def __getstate__(self):
+        # worker processes map the blob themselves instead of receiving a copy of it
+        state = self.__dict__.copy()
+        state["_blob"] = None
+        return state
+
+    def __contains__(self, path) -> bool:
+        return path in self.index
+
+    def __getitem__(self, path) -> np.ndarray:
+        """Returns the stored samples of a clip, as a read-only view of the memory map."""
+        _, offset, length = self.index[path]
+        if length == 0:
+            empty = np.zeros(0, dtype=self.dtype)
+            empty.setflags(write=False)
+            return empty
+        if self._blob is None:
+            if not os.path.exists(self.blob_path):
+                # compacted by another process
+                self._load_index()
+                _, offset, length = self.index[path]
+            self._blob = np.memmap(self.blob_path, dtype=self.dtype, mode="r")
+        return self._blob[offset : offset + length]
+
+    def get_audio(self, path) -> np.ndarray:
+        """Returns the samples of a clip as float32, converting them if the store is int16."""
+        audio = self[path]
+        if self.dtype == np.int16:
+            return audio.astype(np.float32) / 32767
+        return audio
@@ -13,19 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import audio_metadata
 import datasets
 import math
 import os
 import random
-import wave
 from tqdm import tqdm
 
 import numpy as np
 
 from pathlib import Path
 
-from audio_utils import remove_silence_webrtc
+from audio_utils import select_remove_silence
+from clip_assembly import repeat_clip
+from clip_cache import ClipCache
+from manifest import ClipManifest, default_manifest_path
+from sampler import ClipSampler
+from windowing import stream_windows, window_views
 
 
 class Clips:
@@ -42,6 +45,10 @@ class Clips:
         split_count (int | float, optional): The percentage/count of clips to be included in the testing and validation sets. Defaults to 0.1.
         trimmed_clip_duration_s: (float | None, optional): The duration of the clips to trim the end of long clips. Set to None to disable trimming. Defaults to None.
         trim_zerios: (bool, optional): If true, any leading and trailling zeros are removed. Defaults to false.
+        manifest_path (str | None, optional): Path of the sqlite manifest caching the durations of the clips, used when filtering or sampling by duration. Defaults to a file in the user's cache directory (`~/.cache/audiofun/manifests`) keyed by the input directory, see `default_manifest_path`.
+        manifest_processes (int | None, optional): Number of processes probing new or changed clips for the manifest. Defaults to the number of CPUs.
+        cache_dir (str | None, optional): Directory of a ClipCache the filtered clips are decoded to once, at 16 kHz. Clips are then read from the cache instead of being decoded on every access. Set to None to disable the cache. Defaults to None.
+        cache_dtype (str, optional): Sample format of the cache, "float32" or "int16". Defaults to "float32".
     """
 
     def __init__(
@@ -56,6 +63,10 @@ class Clips:
         split_count: int | float = 0.1,
         trimmed_clip_duration_s: float | None = None,
         trim_zeros: bool = False,
+        manifest_path: str | None = None,
+        manifest_processes: int | None = None,
+        cache_dir: str | None = None,
+        cache_dtype: str = "float32",
     ):
         self.trim_zeros = trim_zeros
         self.trimmed_clip_duration_s = trimmed_clip_duration_s
@@ -77,65 +88,42 @@ class Clips:
 
         self.remove_silence = remove_silence
 
-        self.remove_silence_function = remove_silence_webrtc
+        # webrtcvad when installed, otherwise the NumPy energy / zero-crossing detector, with a warning
+        self.remove_silence_function = select_remove_silence(remove_silence)
 
         paths_to_clips = [str(i) for i in Path(input_directory).glob(file_pattern)]
 
+        if manifest_path is None:
+            manifest_path = default_manifest_path(input_directory)
+        self.manifest_path = manifest_path
+        self.manifest_processes = manifest_processes
+
         if (self.min_clip_duration_s == 0) and (math.isinf(self.max_clip_duration_s)):
             # No durations specified, so do not filter by length
             filtered_paths = paths_to_clips
         else:
-            # Filter audio clips by length
-            if file_pattern.endswith("wav"):
-                # If it is a wave file, assume all wave files have the same parameters and filter by file size.
-                # Based on openWakeWord's estimate_clip_duration and filter_audio_paths in data.py, accessed March 2, 2024.
-                with wave.open(paths_to_clips[0], "rb") as input_wav:
-                    channels = input_wav.getnchannels()
-                    sample_width = input_wav.getsampwidth()
-                    sample_rate = input_wav.getframerate()
-                    frames = input_wav.getnframes()
-
-                sizes = []
-                sizes.extend([os.path.getsize(i) for i in paths_to_clips])
-
-                # Correct for the wav file header bytes. Assumes all files in the directory have same parameters.
-                header_correction = (
-                    os.path.getsize(paths_to_clips[0])
-                    - frames * sample_width * channels
-                )
-
-                durations = []
-                for size in sizes:
-                    durations.append(
-                        (size - header_correction)
-                        / (sample_rate * sample_width * channels)
-                    )
-
-                filtered_paths = [
-                    path_to_clip
-                    for path_to_clip, duration in zip(paths_to_clips, durations)
-                    if (self.min_clip_duration_s < duration)
-                    and (duration < self.max_clip_duration_s)
-                ]
-            else:
-                # If not a wave file, use the audio_metadata package to analyze audio file headers for the duration.
-                # This is slower!
-                filtered_paths = []
-
-                if (self.min_clip_duration_s > 0) or (
-                    not math.isinf(self.max_clip_duration_s)
-                ):
-                    for audio_file in paths_to_clips:
-                        metadata = audio_metadata.load(audio_file)
-                        duration = metadata["streaminfo"]["duration"]
-                        if (self.min_clip_duration_s < duration) and (
-                            duration < self.max_clip_duration_s
-                        ):
-                            filtered_paths.append(audio_file)
+            # Filter audio clips by length, read from the headers of every file. Headers are
+            # probed once and kept in the manifest, later runs only probe new or changed files.
+            durations = ClipManifest(manifest_path, manifest_processes).durations(paths_to_clips)
+
+            filtered_paths = [
+                path_to_clip
+                for path_to_clip, duration in zip(paths_to_clips, durations)
+                if (self.min_clip_duration_s < duration)
+                and (duration < self.max_clip_duration_s)
+            ]
+
+        self.paths = [str(i) for i in filtered_paths]
+
+        self._split_paths = {}
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = ClipCache(cache_dir, sample_rate=16000, dtype=cache_dtype)
+            self.cache.materialise(self.paths)
 
         # Load all filtered clips
         audio_dataset = datasets.Dataset.from_dict(
-            {"audio": [str(i) for i in filtered_paths]}
+            {"audio": self.paths}
         ).cast_column("audio", datasets.Audio())
 
         # Convert all clips to 16 kHz sampling rate when accessed
@@ -171,45 +159,55 @@ class Clips:
         Yields:
             numpy.ndarray: Array with the audio clip's samples.
         """
-        if split is None:
-            clip_list = self.clips
-        else:
-            clip_list = self.split_clips[split]
         for _ in range(repeat):
-            for clip in clip_list:
-                clip_audio = clip["audio"]["array"]
+            for clip_audio, clip_path in self._iterate_clips(split):
+                clip_audio = self.prepare_clip(clip_audio)
 
                 # ADDED 04/07/2025
                 # get and return clip path and repetition number
-                clip_path = clip["audio"]["path"]
+                yield clip_audio, (clip_path, _)
 
-                if self.remove_silence:
-                    clip_audio = self.remove_silence_function(clip_audio)
 
-                if self.trim_zeros:
-                    clip_audio = np.trim_zeros(clip_audio)
+    def _clip_list(self, split: str | None = None):
+        if split is None:
+            return self.clips
+        return self.split_clips[split]
 
-                if self.trimmed_clip_duration_s:
-                    total_samples = int(self.trimmed_clip_duration_s * 16000)
-                    clip_audio = clip_audio[:total_samples]
 
-                clip_audio = self.repeat_clip(clip_audio)
-                
-                # ADDED 04/07/2025
-                # get and return clip path and repetition number
-                yield clip_audio, (clip_path, _)
+    def _clip_paths(self, split: str | None = None):
+        # paths of the clips of the split, read without decoding the audio
+        if split is None:
+            return self.paths
+        if split not in self._split_paths:
+            clip_list = self.split_clips[split].cast_column("audio", datasets.Audio(decode=False))
+            self._split_paths[split] = [clip["path"] for clip in clip_list["audio"]]
+        return self._split_paths[split]
+
+
+    def _iterate_clips(self, split: str | None = None):
+        # (samples, path) of every clip of the split, read from the cache when there is one
+        if self.cache is None:
+            for clip in self._clip_list(split):
+                yield clip["audio"]["array"], clip["audio"]["path"]
+        else:
+            for clip_path in self._clip_paths(split):
+                yield self.cache.get_audio(clip_path), clip_path
 
 
-    # TODO sono sicuro che non posso dare due volte la stessa clip? secondo me puo' succedere, e non va bene
-    def get_random_clip(self):
-        """Retrieves a random audio clip.
+    def num_clips(self, split: str | None = None) -> int:
+        """Returns the number of clips in the specified set (all clips if split is None)."""
+        return self._clip_list(split).num_rows
+
+
+    def prepare_clip(self, clip_audio: np.ndarray):
+        """Trims and repeats a decoded clip as configured in the class, before it is retrieved.
+
+        Args:
+            clip_audio (numpy.ndarray): Decoded clip's samples.
 
         Returns:
-            numpy.ndarray: Array with the audio clip's samples.
+            numpy.ndarray: Array with the prepared audio clip's samples.
         """
-        rand_audio_entry = random.choice(self.clips)
-        clip_audio = rand_audio_entry["audio"]["array"]
-
         if self.remove_silence:
             clip_audio = self.remove_silence_function(clip_audio)
 
@@ -220,35 +218,107 @@ class Clips:
             total_samples = int(self.trimmed_clip_duration_s * 16000)
             clip_audio = clip_audio[:total_samples]
 
-        clip_audio = self.repeat_clip(clip_audio)
+        return self.repeat_clip(clip_audio)
+
+
+    def get_clip(self, index: int, split: str | None = None):
+        """Retrieves the audio clip at the given index.
+
+        Args:
+            index (int): Index of the clip in the set.
+            split (str | None, optional): Specifies which set the clip is retrieved from, see `audio_generator`. Defaults to None.
+
+        Returns:
+            tuple: Array with the audio clip's samples and the clip's path.
+        """
+        if self.cache is None:
+            audio_entry = self._clip_list(split)[int(index)]
+            clip_audio = audio_entry["audio"]["array"]
+            clip_path = audio_entry["audio"]["path"]
+        else:
+            clip_path = self._clip_paths(split)[int(index)]
+            clip_audio = self.cache.get_audio(clip_path)
+
+        return self.prepare_clip(clip_audio), clip_path
+
+
+    def clip_durations(self, split: str | None = None) -> np.ndarray:
+        """Returns the duration (in seconds) of every clip of the specified set, read from the manifest."""
+        manifest = ClipManifest(self.manifest_path, self.manifest_processes)
+        return manifest.durations(self._clip_paths(split))
+
+
+    def sample_indices(
+        self,
+        max_clips: int = math.inf,
+        seed: int | None = None,
+        epoch: int = 0,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        weights: np.ndarray | str | None = None,
+    ) -> np.ndarray:
+        """Draws distinct clip indices for an epoch, see `ClipSampler`.
+
+        Args:
+            max_clips (int, optional): The maximum number of indices. Defaults to math.inf.
+            seed (int | None, optional): Seed of the per epoch shuffling. Defaults to None.
+            epoch (int, optional): The epoch number, each epoch has its own order. Defaults to 0.
+            shard_index (int, optional): Index of the shard (worker or node) to draw for. Defaults to 0.
+            num_shards (int, optional): Total number of shards. Defaults to 1.
+            weights (numpy.ndarray | str | None, optional): Sampling weight of every clip, or "duration" to weight clips by their duration. Use `ClipSampler.balanced_weights` to weight by class. Defaults to None.
+
+        Returns:
+            numpy.ndarray: Indices of the clips.
+        """
+        if isinstance(weights, str):
+            if weights != "duration":
+                raise ValueError(f"Unknown weights {weights}")
+            weights = self.clip_durations()
+
+        sampler = ClipSampler(self.clips.num_rows, seed, shard_index, num_shards, weights)
+        return sampler.epoch(epoch, max_clips)
+
+
+    def get_random_clip(self):
+        """Retrieves a random audio clip. Successive calls can return the same clip, use `random_audio_generator` to draw distinct clips.
+
+        Returns:
+            numpy.ndarray: Array with the audio clip's samples.
+        """
+        clip_audio, clip_path = self.get_clip(random.randrange(self.clips.num_rows))
 
         # ADDED 04/07/2025
         # get and return clip path and repetition number
-        clip_path = rand_audio_entry["audio"]["path"]
         return clip_audio, (clip_path)
         # return clip_audio
 
 
-    def random_audio_generator(self, max_clips: int = math.inf):
-        """A Python generator that retrieves random audio clips.
+    def random_audio_generator(
+        self,
+        max_clips: int = math.inf,
+        seed: int | None = None,
+        epoch: int = 0,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        weights: np.ndarray | str | None = None,
+    ):
+        """A Python generator that retrieves random audio clips, without repetitions. Only the drawn clips are decoded.
 
         Args:
             max_clips (int, optional): The total number of clips the generator will yield before the StopIteration. Defaults to math.inf.
+            seed (int | None, optional): Seed of the per epoch shuffling. Defaults to None.
+            epoch (int, optional): The epoch number, each epoch has its own order. Defaults to 0.
+            shard_index (int, optional): Index of the shard (worker or node) to draw for. Defaults to 0.
+            num_shards (int, optional): Total number of shards. Defaults to 1.
+            weights (numpy.ndarray | str | None, optional): See `sample_indices`. Defaults to None.
 
         Yields:
             numpy.ndarray: Array with the random audio clip's samples.
         """
-        # while max_clips > 0:
-        for _ in tqdm(range(self.clips.num_rows), leave=False, desc="Generating random audio"):
-            max_clips -= 1
-            if max_clips == 0:
-                return
-
-            # n_retrieved_clips += 1
-            # if n_retrieved_clips == self.clips.num_rows:
-                # raise StopIteration()
-
-            yield self.get_random_clip()
+        indices = self.sample_indices(max_clips, seed, epoch, shard_index, num_shards, weights)
+        for index in tqdm(indices, leave=False, desc="Generating random audio"):
+            clip_audio, clip_path = self.get_clip(index)
+            yield clip_audio, (clip_path)
 
     def repeat_clip(self, audio_samples: np.array):
         """Repeats the audio clip until its duration exceeds the minimum specified in the class.
@@ -259,11 +329,8 @@ class Clips:
         Returns:
             numpy.ndarray: Array with duration exceeding self.repeat_clip_min_duration_s.
         """
-        original_clip = audio_samples
         desired_samples = int(self.repeat_clip_min_duration_s * 16000)
-        while audio_samples.shape[0] < desired_samples:
-            audio_samples = np.append(audio_samples, original_clip)
-        return audio_samples
+        return repeat_clip(audio_samples, desired_samples)
 
 
 class Clip:
@@ -301,7 +368,8 @@ class Clip:
 
         self.remove_silence = remove_silence
 
-        self.remove_silence_function = remove_silence_webrtc
+        # webrtcvad when installed, otherwise the NumPy energy / zero-crossing detector, with a warning
+        self.remove_silence_function = select_remove_silence(remove_silence)
 
 
     def __init__(
@@ -321,6 +389,7 @@ class Clip:
         self.setup(repeat_clip_min_duration_s, remove_silence, trimmed_clip_duration_s, trim_zeros)
 
         # paths_to_clips = [str(i) for i in Path(input_directory).glob(file_pattern)]
+        self.clip_path = str(clip_path)
         paths_to_clips = [clip_path]
 
         # Load all filtered clips
@@ -337,6 +406,9 @@ class Clip:
         print(f"LOADED CLIPS {self.clips.num_columns}x{self.clips.num_rows}")
 
 
+    repeat_clip = Clips.repeat_clip
+
+
     # XXX yield sequentially truncated part of clip
     def audio_generator(self, split: str | None = None, repeat: int = 1):
         """A Python generator that retrieves all loaded audio clips.
@@ -378,29 +450,49 @@ class Clip:
 
 
     # XXX yield randomly truncated part of clip
-    def random_audio_generator(self, max_clips: int = math.inf):
-        """A Python generator that retrieves random audio clips.
+    def random_audio_generator(
+        self,
+        max_clips: int = math.inf,
+        window_s: float = 3.2,
+        hop_s: float | None = None,
+        random_offset: bool = False,
+        seed: int | None = None,
+        stream: bool = False,
+    ):
+        """A Python generator that splits the clip in fixed size windows, yielded as zero-copy views.
 
         Args:
-            max_clips (int, optional): The total number of clips the generator will yield before the StopIteration. Defaults to math.inf.
+            max_clips (int, optional): The total number of windows the generator will yield before the StopIteration. Defaults to math.inf.
+            window_s (float, optional): The duration of the windows in seconds. Defaults to 3.2.
+            hop_s (float | None, optional): The time between the starts of consecutive windows in seconds. Windows overlap if it is shorter than `window_s`. Set to None to use `window_s`. Defaults to None.
+            random_offset (bool, optional): If true, the first window starts at a random position within the first hop. Defaults to False.
+            seed (int | None, optional): Seed of the random offset. Defaults to None.
+            stream (bool, optional): If true, the file is read and resampled block by block instead of being decoded whole. Defaults to False.
 
         Yields:
-            numpy.ndarray: Array with the random audio clip's samples.
+            tuple: Array with the window's samples and (clip path, (start sample, end sample)).
         """
-
-        # get first (and only clip)
-        clip = self.clips[0]
-
-        # 16kHz array of samples
-        clip_audio = clip["audio"]["array"]
-        
-        n_sec = 3.2
         s_r = 16000 # ok because it's previously converted and casted
-        randomly_selcted_samples = [(clip_audio[i:int((n_sec*s_r)) * (i+1)], (i, (n_sec*s_r) * (i+1))) for i in range(int(len(clip_audio)/(n_sec*s_r)))]
+        window_samples = int(window_s * s_r)
+        hop_samples = int(hop_s * s_r) if hop_s is not None else window_samples
 
-        for v in tqdm(randomly_selcted_samples, leave=False, desc="Getting randomly splitted audio"):
-            random_clip = v[0]
-            rng = v[1]
-            # get and return clip path and repetition number
-            yield random_clip, (clip["audio"]["path"], rng)
+        offset = 0
+        if random_offset:
+            offset = int(np.random.default_rng(seed).integers(hop_samples))
 
+        clip_path = self.clip_path
+        if stream:
+            windows = stream_windows(clip_path, window_samples, hop_samples, offset, s_r)
+        else:
+            # get first (and only clip), 16kHz array of samples
+            clip_audio = self.clips[0]["audio"]["array"]
+            views = window_views(clip_audio, window_samples, hop_samples, offset)
+            windows = ((window, offset + i * hop_samples) for i, window in enumerate(views))
+
+        for count, (window, start) in enumerate(
+            tqdm(windows, leave=False, desc="Getting randomly splitted audio")
+        ):
+            if count >= max_clips:
+                return
+            # get and return clip path and window range
+            yield window, (clip_path, (start, start + window_samples))
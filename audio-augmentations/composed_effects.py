@@ -1,8 +1,6 @@
 from audiomentations import (
     Compose,
     OneOf,
-    AddBackgroundNoise,
-    ApplyImpulseResponse,
     PitchShift,
     TimeStretch,
     BandPassFilter,
@@ -11,9 +9,13 @@ from audiomentations import (
     AddColorNoise,
     Normalize
 )
-from .custom_augmentations import AddCustomFunction
+from background_noise import AddBankedBackgroundNoise
+from custom_augmentations import AddCustomFunction
+from reverb import ApplyPrecomputedImpulseResponse
 
-def aggressive():
+def aggressive(augmentation_duration_s: float = 3.2, sample_rate: int = 16000):
+    # the impulse response spectra are computed for clips of the augmented length
+    clip_samples = int(augmentation_duration_s * sample_rate)
     return Compose(
     [
         # change voice nature
@@ -25,16 +27,21 @@ def aggressive():
             p=0.9,
         ),
         # simulate environment
-        AddBackgroundNoise(
+        AddBankedBackgroundNoise(
             sounds_path=[
                 "_augmentation_data/fma_16k",
                 "_augmentation_data/audioset_16k",
             ],
-            min_snr_in_db=0,
-            max_snr_in_db=15,
+            min_snr_db=0,
+            max_snr_db=15,
             p=0.9,
         ),
-        ApplyImpulseResponse(ir_path=["_augmentation_data/mit_rirs"], p=0.7),
+        ApplyPrecomputedImpulseResponse(
+            ir_path=["_augmentation_data/mit_rirs"],
+            clip_samples=clip_samples,
+            sample_rate=sample_rate,
+            p=0.7,
+        ),
         AddColorNoise(
             p=0.5,
             min_snr_db=10,
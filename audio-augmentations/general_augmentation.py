@@ -20,6 +20,10 @@ import numpy as np
 
 from typing import List
 
+from batch_augmentation import BatchAugmenter
+from clip_assembly import assemble_clip
+from param_recorder import collect_parameters
+
 
 class GeneralAugmentation:
     """A class that handles applying augmentations to audio clips.
@@ -38,6 +42,8 @@ class GeneralAugmentation:
         min_jitter_s (float, optional): The minimum duration in seconds that the original clip is positioned before the end of the augmented audio. Defaults to 0.0.
         max_jitter_s (float, optional): The maximum duration in seconds that the original clip is positioned before the end of the augmented audio. Defaults to 0.0.
         truncate_randomly: (bool, option): If true, the clip is truncated to the specified duration randomly. Otherwise, the start of the clip is truncated.
+        record_parameters (bool, optional): If true, `augment_clip` also returns the parameters applied by every transform. Disable it when they are not logged. Defaults to True.
+        sample_rate (int, optional): Sample rate of the clips. Defaults to 16000.
     """
 
     def __init__(
@@ -47,17 +53,21 @@ class GeneralAugmentation:
         min_jitter_s: float = 0.0,
         max_jitter_s: float = 0.0,
         truncate_randomly: bool = False,
+        record_parameters: bool = True,
+        sample_rate: int = 16000,
     ):
         self.truncate_randomly = truncate_randomly
+        self.record_parameters = record_parameters
+        self.sample_rate = sample_rate
         ############################################
         # Configure audio duration and positioning #
         ############################################
 
-        self.min_jitter_samples = int(min_jitter_s * 16000)
-        self.max_jitter_samples = int(max_jitter_s * 16000)
+        self.min_jitter_samples = int(min_jitter_s * sample_rate)
+        self.max_jitter_samples = int(max_jitter_s * sample_rate)
 
         if augmentation_duration_s is not None:
-            self.augmented_samples = int(augmentation_duration_s * 16000)
+            self.augmented_samples = int(augmentation_duration_s * sample_rate)
         else:
             self.augmented_samples = None
 
@@ -72,8 +82,16 @@ class GeneralAugmentation:
        
         # Based on openWakeWord's augmentations, accessed on February 23, 2024.
         self.augment = augment
+        # built once, `augment_batch` reseeds it when given a seed
+        self.batch_augmenter = BatchAugmenter(augment, sample_rate=sample_rate)
 
     
+    def draw_jitter(self):
+        """Draws a random jitter duration (in samples) between the class's min_jitter_s and max_jitter_s paramters."""
+        if self.min_jitter_samples < self.max_jitter_samples:
+            return np.random.randint(self.min_jitter_samples, self.max_jitter_samples)
+        return self.min_jitter_samples
+
     def add_jitter(self, input_audio: np.ndarray):
         """Pads the clip on the right by a random duration between the class's min_jitter_s and max_jitter_s paramters.
 
@@ -83,46 +101,36 @@ class GeneralAugmentation:
         Returns:
             numpy.ndarray: Array of audio samples with silence added to the end.
         """
-        if self.min_jitter_samples < self.max_jitter_samples:
-            jitter_samples = np.random.randint(
-                self.min_jitter_samples, self.max_jitter_samples
-            )
-        else:
-            jitter_samples = self.min_jitter_samples
-
         # Pad audio on the right by jitter samples
-        return np.pad(input_audio, (0, jitter_samples))
+        return assemble_clip(input_audio, jitter_samples=self.draw_jitter())
 
-    def create_fixed_size_clip(self, input_audio: np.ndarray):
+    def create_fixed_size_clip(self, input_audio: np.ndarray, jitter_samples: int = 0):
         """Ensures the input audio clip has a fixced length. If the duration is too long, the start of the clip is removed. If it is too short, the start of the clip is padded with silence.
 
         Args:
             input_audio (numpy.ndarray): Array containing the audio clip's samples.
+            jitter_samples (int, optional): Silence added to the end of the clip first, as `add_jitter` does, in the same output array. Defaults to 0.
 
         Returns:
             numpy.ndarray: Array of audio samples with `augmented_duration_s` length.
         """
-        if self.augmented_samples is None:
+        if self.augmented_samples is None and not jitter_samples:
             return input_audio
 
-        if self.augmented_samples < input_audio.shape[0]:
+        total_samples = input_audio.shape[0] + jitter_samples
+        start = None
+        if self.augmented_samples is not None and self.augmented_samples < total_samples:
             # Truncate the too long audio by removing the start of the clip
             if self.truncate_randomly:
-                random_start = np.random.randint(
-                    0, input_audio.shape[0] - self.augmented_samples
-                )
-                input_audio = input_audio[
-                    random_start : random_start + self.augmented_samples
-                ]
-            else:
-                input_audio = input_audio[-self.augmented_samples :]
-        else:
-            # Pad with zeros at start of too short audio clip
-            left_padding_samples = self.augmented_samples - input_audio.shape[0]
-
-            input_audio = np.pad(input_audio, (left_padding_samples, 0))
+                start = np.random.randint(0, total_samples - self.augmented_samples)
 
-        return input_audio
+        # Pad with zeros at start of too short audio clip
+        return assemble_clip(
+            input_audio,
+            jitter_samples=jitter_samples,
+            fixed_samples=self.augmented_samples,
+            start=start,
+        )
 
     def augment_clip(self, input_audio: np.ndarray):
         """Augments the input audio after adding jitter and creating a fixed size clip.
@@ -131,30 +139,23 @@ class GeneralAugmentation:
             input_audio (numpy.ndarray): Array containing the audio clip's samples.
 
         Returns:
-            numpy.ndarray: The augmented audio of fixed duration.
+            tuple: The augmented audio of fixed duration, and the parameters applied by every transform (None if `record_parameters` is false).
         """
-        input_audio = self.add_jitter(input_audio)
-        input_audio = self.create_fixed_size_clip(input_audio)
+        # jitter and fixed size in a single allocation
+        input_audio = self.create_fixed_size_clip(input_audio, self.draw_jitter())
 
         with warnings.catch_warnings():
             warnings.simplefilter(
                 "ignore"
             )  # Suppresses warning about background clip being too quiet... TODO: find better approach!
-            output_audio = self.augment(input_audio, sample_rate=16000)
+            output_audio = self.augment(input_audio, sample_rate=self.sample_rate)
 
             # ADDED ON 4/07/2025
             # farm applied parameters
-            applied_parameters = []
-            for transform in self.augment.transforms:
-                params = {}
-                if isinstance(transform, audiomentations.OneOf)\
-                    or isinstance(transform, audiomentations.SomeOf):
-                    params = [(tr.__class__.__name__, tr.parameters) for tr in transform.transforms]                        
-                elif 'parameters' in transform.__dir__():
-                    params = transform.parameters
-
-                applied_parameters.append((transform.__class__.__name__, params))
-        
+            applied_parameters = None
+            if self.record_parameters:
+                applied_parameters = collect_parameters(self.augment)
+
         return output_audio, applied_parameters
 
     def augment_generator(self, audio_generator):
@@ -170,3 +171,52 @@ class GeneralAugmentation:
         # get and return clip path and repetition number
         for audio, path_data in audio_generator:
             yield self.augment_clip(audio), path_data
+
+    def augment_batch(self, input_batch, seed=None):
+        """Augments a batch of clips at once, see `BatchAugmenter`.
+
+        Args:
+            input_batch (numpy.ndarray | list): Array of fixed size clips of shape (batch, samples), or a list of clips of any size, which get jitter and a fixed size first like in `augment_clip`.
+            seed (int | numpy.random.Generator | None, optional): Seed of the batched parameter draws. Defaults to None, to continue the draws of the previous batches.
+
+        Returns:
+            tuple: The augmented (batch, samples) array and the applied parameters of every clip.
+        """
+        if isinstance(input_batch, list):
+            input_batch = np.stack(
+                [self.create_fixed_size_clip(clip, self.draw_jitter()) for clip in input_batch]
+            )
+
+        if seed is not None:
+            self.batch_augmenter.rng = np.random.default_rng(seed)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return self.batch_augmenter(input_batch)
+
+    def augment_batch_generator(self, audio_generator, batch_size: int = 64, seed=None):
+        """Same as `augment_generator`, but clips are augmented `batch_size` at a time with `augment_batch`.
+
+        Args:
+            audio_generator (generator): A Python generator that yields audio clips.
+            batch_size (int, optional): Number of clips augmented together. Defaults to 64.
+            seed (int | None, optional): Seed of the batched parameter draws. Defaults to None.
+
+        Yields:
+            tuple: The augmented audio clip's samples and applied parameters, and the clip's path data.
+        """
+        rng = np.random.default_rng(seed)
+        clips, path_data = [], []
+        for audio, clip_path_data in audio_generator:
+            clips.append(audio)
+            path_data.append(clip_path_data)
+            if len(clips) == batch_size:
+                yield from self._yield_batch(clips, path_data, rng)
+                clips, path_data = [], []
+        if clips:
+            yield from self._yield_batch(clips, path_data, rng)
+
+    def _yield_batch(self, clips, path_data, rng):
+        output_batch, applied_parameters = self.augment_batch(clips, rng)
+        for output_audio, parameters, clip_path_data in zip(output_batch, applied_parameters, path_data):
+            yield (output_audio, parameters), clip_path_data
@@ -0,0 +1,156 @@
+import math
+import multiprocessing
+import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+from tqdm import tqdm
+
+
+# Clips object of a worker process, set once by the pool initializer
+_worker_clips = None
+
+
+def _init_worker(clips, seed, counter):
+    global _worker_clips
+    _worker_clips = clips
+
+    with counter.get_lock():
+        worker_id = counter.value
+        counter.value += 1
+    if seed is not None:
+        random.seed(seed + worker_id)
+        np.random.seed((seed + worker_id) % 2**32)
+
+
+def _worker_get_clip(index, split):
+    return _worker_clips.get_clip(index, split)
+
+
+def bounded_map(executor, make_call, tasks, prefetch: int, ordered: bool = True):
+    """Submits tasks to an executor with at most `prefetch` of them in flight.
+
+    Args:
+        executor (concurrent.futures.Executor): The executor running the calls.
+        make_call (callable): Maps a task to the (function, *args) tuple to submit.
+        tasks (iterable): The tasks, consumed lazily.
+        prefetch (int): Maximum number of submitted tasks whose result was not yielded yet.
+        ordered (bool, optional): If true, results are yielded in the order of the tasks, otherwise as soon as they are ready. Defaults to True.
+
+    Yields:
+        tuple: Each task and the result of its call.
+    """
+    pending = deque()
+    tasks = iter(tasks)
+    while True:
+        for task in tasks:
+            pending.append((task, executor.submit(*make_call(task))))
+            if len(pending) >= prefetch:
+                break
+
+        if not pending:
+            return
+
+        if ordered:
+            task, future = pending.popleft()
+        else:
+            wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+            position = next(i for i, (_, future) in enumerate(pending) if future.done())
+            task, future = pending[position]
+            del pending[position]
+
+        yield task, future.result()
+
+
+class ClipLoader:
+    """Loads clips from a Clips object with a pool of workers, ahead of the consumer.
+
+    Decoding, silence removal, trimming and repeating run in the workers while the consumer (e.g. `Augmentation.augment_generator`) works on the clips already loaded. At most `prefetch` clips are loaded or waiting at any time. The generators yield the same values as the ones of Clips, so they can be used in their place.
+
+    Args:
+        clips (Clips): The clips to load.
+        workers (int, optional): Number of workers. Defaults to 4.
+        prefetch (int, optional): Maximum number of clips loaded ahead of the consumer. Defaults to 64.
+        ordered (bool, optional): If true, clips are yielded in the same order as the Clips generators. Otherwise, they are yielded as soon as they are loaded. Defaults to True.
+        seed (int | None, optional): Seed of the random clip selection. Worker processes seed `random` and `numpy.random` with seed + worker index. Defaults to None.
+        use_threads (bool, optional): Use threads instead of processes. Cheaper to start and enough when loading is bound by I/O. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        clips,
+        workers: int = 4,
+        prefetch: int = 64,
+        ordered: bool = True,
+        seed: int | None = None,
+        use_threads: bool = False,
+    ):
+        self.clips = clips
+        self.workers = workers
+        self.prefetch = max(prefetch, workers)
+        self.ordered = ordered
+        self.seed = seed
+        self.use_threads = use_threads
+
+    def _executor(self):
+        if self.use_threads:
+            return ThreadPoolExecutor(self.workers), self.clips.get_clip
+        executor = ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(self.clips, self.seed, multiprocessing.Value("i", 0)),
+        )
+        return executor, _worker_get_clip
+
+    def _load(self, tasks):
+        # yields (task, (clip_audio, clip_path)) keeping at most self.prefetch clips in flight
+        executor, get_clip = self._executor()
+        try:
+            yield from bounded_map(
+                executor, lambda task: (get_clip, task[0], task[1]), tasks, self.prefetch, self.ordered
+            )
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def audio_generator(self, split: str | None = None, repeat: int = 1):
+        """A Python generator that retrieves all loaded audio clips, see `Clips.audio_generator`.
+
+        Args:
+            split (str | None, optional): Specifies which set the clips are retrieved from. Defaults to None.
+            repeat (int, optional): The number of times each audio clip will be yielded. Defaults to 1.
+
+        Yields:
+            tuple: Array with the audio clip's samples and (clip path, repetition number).
+        """
+        num_clips = self.clips.num_clips(split)
+        tasks = ((index, split, repetition) for repetition in range(repeat) for index in range(num_clips))
+        for task, (clip_audio, clip_path) in self._load(tasks):
+            yield clip_audio, (clip_path, task[2])
+
+    def random_audio_generator(
+        self,
+        max_clips: int = math.inf,
+        epoch: int = 0,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        weights: np.ndarray | str | None = None,
+    ):
+        """A Python generator that retrieves random audio clips without repetitions, see `Clips.random_audio_generator`. Clips are drawn with the loader's seed.
+
+        Args:
+            max_clips (int, optional): The total number of clips the generator will yield. Defaults to math.inf.
+            epoch (int, optional): The epoch number, each epoch has its own order. Defaults to 0.
+            shard_index (int, optional): Index of the shard (worker or node) to draw for. Defaults to 0.
+            num_shards (int, optional): Total number of shards. Defaults to 1.
+            weights (numpy.ndarray | str | None, optional): See `Clips.sample_indices`. Defaults to None.
+
+        Yields:
+            tuple: Array with the audio clip's samples and the clip's path.
+        """
+        indices = self.clips.sample_indices(max_clips, self.seed, epoch, shard_index, num_shards, weights)
+        tasks = ((index, None) for index in indices)
+        for _, (clip_audio, clip_path) in tqdm(
+            self._load(tasks), total=len(indices), leave=False, desc="Generating random audio"
+        ):
+            yield clip_audio, (clip_path)
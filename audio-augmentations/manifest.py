@@ -0,0 +1,118 @@
+import hashlib
+import math
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import audio_metadata
+import numpy as np
+import soundfile as sf
+
+
+def probe_clip(path: str) -> tuple:
+    """Reads the header of an audio file.
+
+    Args:
+        path (str): Path to the audio file.
+
+    Returns:
+        tuple: (sample_rate, channels, frames, duration_s) of the file.
+    """
+    try:
+        info = sf.info(path)
+        return info.samplerate, info.channels, info.frames, info.frames / info.samplerate
+    except RuntimeError:
+        # formats libsndfile can not read, parse the headers with audio_metadata (slower)
+        streaminfo = audio_metadata.load(path)["streaminfo"]
+        sample_rate = streaminfo["sample_rate"]
+        duration = streaminfo["duration"]
+        return sample_rate, streaminfo["channels"], int(round(duration * sample_rate)), duration
+
+
+def default_manifest_path(input_directory: str) -> str:
+    """Path of the manifest of a directory in the user's cache, so the corpus directory is never written to.
+
+    Args:
+        input_directory (str): The directory of the clips.
+
+    Returns:
+        str: `$XDG_CACHE_HOME/audiofun/manifests/<hash of the absolute directory path>.sqlite`, under `~/.cache` if XDG_CACHE_HOME is not set.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    digest = hashlib.sha1(os.path.abspath(input_directory).encode()).hexdigest()[:16]
+    return os.path.join(cache_home, "audiofun", "manifests", f"{digest}.sqlite")
+
+
+class ClipManifest:
+    """Persistent index of the headers of a corpus of audio files, stored in sqlite.
+
+    Every file is probed once for sample rate, channels, frames and duration. The result is kept
+    together with the file size and modification time, so later runs only probe files that are new
+    or changed since. Probing runs in a process pool.
+
+    Args:
+        manifest_path (str): Path of the sqlite database, created if missing.
+        processes (int | None, optional): Number of worker processes used for probing. Defaults to the number of CPUs.
+    """
+
+    def __init__(self, manifest_path: str, processes: int | None = None):
+        self.manifest_path = manifest_path
+        self.processes = processes
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        with sqlite3.connect(self.manifest_path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS clips ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "sample_rate INTEGER, channels INTEGER, frames INTEGER, duration REAL)"
+            )
+
+    def scan(self, paths: list) -> dict:
+        """Returns the metadata of the given files, probing only new or changed ones.
+
+        Args:
+            paths (list): Paths to the audio files.
+
+        Returns:
+            dict: Maps each path to a (sample_rate, channels, frames, duration_s) tuple.
+        """
+        stats = {path: os.stat(path) for path in paths}
+
+        with sqlite3.connect(self.manifest_path) as connection:
+            known = {
+                path: (size, mtime_ns, tuple(row))
+                for path, size, mtime_ns, *row in connection.execute(
+                    "SELECT path, size, mtime_ns, sample_rate, channels, frames, duration FROM clips"
+                )
+            }
+
+        metadata = {}
+        stale = []
+        for path, stat in stats.items():
+            entry = known.get(path)
+            if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                metadata[path] = entry[2]
+            else:
+                stale.append(path)
+
+        if stale:
+            processes = self.processes or os.cpu_count() or 1
+            chunksize = max(1, math.ceil(len(stale) / (processes * 16)))
+            with ProcessPoolExecutor(processes) as executor:
+                probed = list(executor.map(probe_clip, stale, chunksize=chunksize))
+
+            with sqlite3.connect(self.manifest_path) as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (path, stats[path].st_size, stats[path].st_mtime_ns, *row)
+                        for path, row in zip(stale, probed)
+                    ],
+                )
+            metadata.update(zip(stale, probed))
+
+        return metadata
+
+    def durations(self, paths: list) -> np.ndarray:
+        """Returns the duration (in seconds) of each file, in the order of `paths`."""
+        metadata = self.scan(paths)
+        return np.array([metadata[path][3] for path in paths], dtype=np.float64)
@@ -0,0 +1,123 @@
+import hashlib
+import multiprocessing
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loader import bounded_map
+
+
+# Augmentation object of a worker process, set once by the pool initializer
+_worker_augmenter = None
+
+
+def _init_worker(augmenter):
+    global _worker_augmenter
+    _worker_augmenter = augmenter
+
+
+def clip_seed(seed: int, clip_path: str, repetition) -> int:
+    """Derives the seed of one augmented clip.
+
+    The seed only depends on its arguments, not on the process or on the order clips are processed in. A stable hash is used, Python's `hash` of strings changes between processes.
+
+    Args:
+        seed (int): The global seed of the run.
+        clip_path (str): Path of the source clip.
+        repetition (int | object): Repetition number of the clip, or any value telling apart the clips of the same path (e.g. the window of a Clip).
+
+    Returns:
+        int: A 64 bit seed.
+    """
+    key = f"{seed}\0{clip_path}\0{repetition}".encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def augment_seeded(augmenter, audio: np.ndarray, seed: int):
+    """Augments one clip after seeding every random source the augmentation uses.
+
+    Jitter, truncation and the audiomentations transforms all draw from the global `random` and `numpy.random` states, so seeding both right before `augment_clip` makes the result depend on the seed only.
+
+    Args:
+        augmenter (Augmentation | GeneralAugmentation): The augmentation to apply.
+        audio (numpy.ndarray): The input clip's samples.
+        seed (int): The clip's seed, see `clip_seed`.
+
+    Returns:
+        tuple: The result of `augment_clip`.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    return augmenter.augment_clip(audio)
+
+
+def _worker_augment(audio, seed):
+    return augment_seeded(_worker_augmenter, audio, seed)
+
+
+class ParallelAugmenter:
+    """Augments the clips of an audio generator with a pool of worker processes.
+
+    Every clip is augmented with its own seed, derived from (seed, clip path, repetition number), so the output is bit-identical whatever the number of workers and whether results are ordered or not. With `workers=0` the clips are augmented in the calling process, with the same results.
+
+    Args:
+        augmenter (Augmentation | GeneralAugmentation): The augmentation to apply. It is sent once to every worker, so it must be picklable.
+        seed (int, optional): Global seed of the run. Defaults to 0.
+        workers (int | None, optional): Number of worker processes. Set to None to use one per CPU. Defaults to None.
+        prefetch (int | None, optional): Maximum number of clips submitted and not yet yielded. Defaults to 4 per worker.
+        ordered (bool, optional): If true, augmented clips are yielded in the order of the input generator. Otherwise, they are yielded as soon as they are ready. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        augmenter,
+        seed: int = 0,
+        workers: int | None = None,
+        prefetch: int | None = None,
+        ordered: bool = True,
+    ):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.augmenter = augmenter
+        self.seed = seed
+        self.workers = workers
+        self.prefetch = max(prefetch or 4 * workers, workers, 1)
+        self.ordered = ordered
+
+    def _seeded(self, audio_generator):
+        # yields (audio, path_data, seed); generators yielding only a path get the occurrence count as repetition
+        occurrences = Counter()
+        for audio, path_data in audio_generator:
+            if isinstance(path_data, tuple):
+                clip_path, repetition = path_data[0], path_data[1]
+            else:
+                clip_path = path_data
+                repetition = occurrences[clip_path]
+                occurrences[clip_path] += 1
+            yield audio, path_data, clip_seed(self.seed, clip_path, repetition)
+
+    def augment_generator(self, audio_generator):
+        """A Python generator that augments clips retrieved from the input audio generator, see `Augmentation.augment_generator`.
+
+        Args:
+            audio_generator (generator): A Python generator that yields audio clips and their path data, e.g. `Clips.audio_generator` or `ClipLoader.audio_generator`.
+
+        Yields:
+            tuple: The result of `augment_clip` and the clip's path data.
+        """
+        tasks = self._seeded(audio_generator)
+        if self.workers == 0:
+            for audio, path_data, seed in tasks:
+                yield augment_seeded(self.augmenter, audio, seed), path_data
+            return
+
+        executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.augmenter,))
+        try:
+            for (_, path_data, _), augmented in bounded_map(
+                executor, lambda task: (_worker_augment, task[0], task[2]), tasks, self.prefetch, self.ordered
+            ):
+                yield augmented, path_data
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
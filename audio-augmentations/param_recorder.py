@@ -0,0 +1,247 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Parquet when pyarrow is installed, JSON lines otherwise
+DEFAULT_FORMAT = "parquet" if PYARROW_AVAILABLE else "jsonl"
+
+
+def collect_parameters(compose) -> list:
+    """Snapshots the parameters the transforms of a Compose applied to the last clip.
+
+    audiomentations updates the `parameters` dict of a transform in place on every call, so the dicts are copied.
+
+    Args:
+        compose (audiomentations.Compose): The augmentation chain that was just called.
+
+    Returns:
+        list: (transform name, parameters) for every transform. Parameters of OneOf, SomeOf and nested Compose transforms are lists in the same format.
+    """
+    applied_parameters = []
+    for transform in compose.transforms:
+        if hasattr(transform, "transforms"):
+            params = collect_parameters(transform)
+        else:
+            params = dict(getattr(transform, "parameters", {}))
+        applied_parameters.append((transform.__class__.__name__, params))
+    return applied_parameters
+
+
+def _dtype(value) -> np.dtype:
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(bool)
+    if isinstance(value, (int, np.integer)):
+        return np.dtype(np.int64)
+    if isinstance(value, (float, np.floating)):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _json_text(values: list) -> list:
+    return [None if value is None else json.dumps(value, default=str) for value in values]
+
+
+def _promote_schema(schema, new_schema):
+    # union of the columns, each with a type that holds the values of both, text as a last resort
+    fields = []
+    for name in schema.names + [name for name in new_schema.names if name not in schema.names]:
+        if name not in new_schema.names:
+            fields.append(schema.field(name))
+        elif name not in schema.names:
+            fields.append(new_schema.field(name))
+        else:
+            try:
+                both = [pa.schema([schema.field(name)]), pa.schema([new_schema.field(name)])]
+                fields.append(pa.unify_schemas(both, promote_options="permissive").field(name))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _conform(table, schema):
+    # the table with the columns and types of the schema, missing columns are null
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(len(table), field.type))
+            continue
+        column = table.column(field.name)
+        if column.type != field.type:
+            if pa.types.is_string(field.type) and not pa.types.is_null(column.type):
+                column = pa.array(_json_text(column.to_pylist()), pa.string())
+            else:
+                column = column.cast(field.type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class _Column:
+    # one chunk of a field: typed values and the mask of the rows that have one
+    __slots__ = ("values", "valid")
+
+    def __init__(self, dtype: np.dtype, size: int):
+        self.values = np.empty(size, dtype=dtype)
+        self.valid = np.zeros(size, dtype=bool)
+
+    def set(self, row: int, value):
+        if value is None:
+            # missing, the row stays invalid
+            return
+        dtype = _dtype(value)
+        if dtype != self.values.dtype:
+            numeric = {self.values.dtype.kind, dtype.kind} == {"i", "f"}
+            self.values = self.values.astype(np.float64 if numeric else object)
+        if self.values.dtype == object:
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            elif isinstance(value, tuple):
+                value = list(value)
+        self.values[row] = value
+        self.valid[row] = True
+
+
+class ParameterRecorder:
+    """Streams the parameters applied to every augmented clip to a columnar file, chunk by chunk.
+
+    Every applied parameter is a column named after the transform's position and class and the parameter, e.g. "5.AddBankedBackgroundNoise.snr_db"; transforms inside OneOf, SomeOf and Compose get a nested position, e.g. "0.OneOf.1.TimeStretch.rate". Only the `should_apply` flag is recorded for transforms that were not applied. Values are kept in typed arrays of `chunk_size` rows and written when the chunk is full, so memory does not grow with the number of clips.
+
+    Parquet files need pyarrow. Chunks are cast to the schema of the file. A Parquet file can not change schema once started, so when a column first appears, or needs a wider type (e.g. float values after int ones, text after numbers), the chunks already written are rewritten once with the promoted schema. The file is written aside and moved to `output_path` on close.
+
+    Args:
+        output_path (str): Path of the output file, ".parquet" or ".jsonl".
+        chunk_size (int, optional): Number of clips kept in memory before writing. Defaults to 4096.
+    """
+
+    def __init__(self, output_path: str, chunk_size: int = 4096):
+        self.output_path = output_path
+        self.format = os.path.splitext(output_path)[1].lstrip(".")
+        if self.format not in ("parquet", "jsonl"):
+            raise ValueError(f"Unsupported parameter file format {self.format}, use .parquet or .jsonl")
+        if self.format == "parquet" and not PYARROW_AVAILABLE:
+            raise ImportError("Writing parameters to Parquet requires pyarrow")
+
+        self.chunk_size = chunk_size
+        self.columns = {}
+        self.rows = 0
+        self._writer = None
+        self._writer_path = None
+        self._schema = None
+        self._file = None
+
+    def _set(self, name: str, value):
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = _Column(_dtype(value), self.chunk_size)
+        column.set(self.rows, value)
+
+    def _set_parameters(self, applied_parameters, prefix: str):
+        for position, (name, params) in enumerate(applied_parameters):
+            key = f"{prefix}{position}.{name}"
+            if isinstance(params, list):
+                self._set_parameters(params, key + ".")
+            elif params.get("should_apply"):
+                for field, value in params.items():
+                    self._set(f"{key}.{field}", value)
+            elif params:
+                # the other values of a transform that was not applied are left over from earlier clips
+                self._set(f"{key}.should_apply", False)
+
+    def record(self, applied_parameters: list, **fields):
+        """Records the parameters of one clip.
+
+        Args:
+            applied_parameters (list): The parameters returned by `augment_clip`, see `collect_parameters`.
+            **fields: Other columns of the clip, e.g. its output and source paths.
+        """
+        for name, value in fields.items():
+            self._set(name, value)
+        self._set_parameters(applied_parameters, "")
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the recorded clips that were not written yet."""
+        if not self.rows:
+            return
+        if self.format == "parquet":
+            self._write_parquet()
+        else:
+            self._write_jsonl()
+        for column in self.columns.values():
+            column.valid[:] = False
+            if column.values.dtype == object:
+                column.values[:] = None
+        self.rows = 0
+
+    def _arrow_array(self, column):
+        values, valid = column.values[: self.rows], column.valid[: self.rows]
+        if values.dtype != object:
+            return pa.array(values, mask=~valid)
+        # rows without a value may hold values of an earlier chunk or of a promotion
+        values = np.where(valid, values, None).tolist()
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # mixed types: stored as JSON text
+            return pa.array(_json_text(values), pa.string())
+
+    def _open_writer(self, schema):
+        fd, self._writer_path = tempfile.mkstemp(suffix=".parquet.tmp", dir=os.path.dirname(os.path.abspath(self.output_path)))
+        os.close(fd)
+        self._schema = schema
+        self._writer = pq.ParquetWriter(self._writer_path, schema)
+
+    def _write_parquet(self):
+        table = pa.table({name: self._arrow_array(column) for name, column in self.columns.items()})
+        if self._writer is None:
+            self._open_writer(table.schema)
+        else:
+            schema = _promote_schema(self._schema, table.schema)
+            if not schema.equals(self._schema):
+                # the chunks written so far are rewritten with the promoted schema
+                self._writer.close()
+                written = pq.read_table(self._writer_path)
+                os.remove(self._writer_path)
+                self._open_writer(schema)
+                self._writer.write_table(_conform(written, schema))
+        self._writer.write_table(_conform(table, self._schema))
+
+    def _write_jsonl(self):
+        if self._file is None:
+            self._file = open(self.output_path, "w")
+        names = list(self.columns)
+        values = [self.columns[name].values[: self.rows].tolist() for name in names]
+        valid = [self.columns[name].valid[: self.rows] for name in names]
+        lines = []
+        for row in range(self.rows):
+            record = {name: values[i][row] for i, name in enumerate(names) if valid[i][row]}
+            lines.append(json.dumps(record, default=str))
+        self._file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        """Writes the remaining clips and closes the output file."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._writer_path, self.output_path)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import fft
+
+from audiomentations.core.transforms_interface import BaseWaveformTransform
+from audiomentations.core.utils import find_audio_files_in_paths
+
+from clip_cache import decode_clip
+
+
+class ImpulseResponseSpectra:
+    """Bank of room impulse responses, transformed once for clips of a fixed length and memory-mapped.
+
+    All impulse responses are decoded to mono at `sample_rate` and their rFFTs are computed once at a shared FFT size, long enough for the full linear convolution of a `clip_samples` long clip with the longest of them. Reverberating a clip is then one rfft, one multiply and one irfft, and a batch of clips with different impulse responses is convolved with a single call of each.
+
+    The spectra are saved to a .npy file in `cache_dir`, keyed by the files, `clip_samples` and `sample_rate`, and memory-mapped read-only. Later runs with the same settings skip the decoding, and pickling the bank to a worker process only sends the path of the file, so every worker maps the same pages instead of holding its own copy.
+
+    Args:
+        ir_path (list | str): Impulse response file(s) and/or folder(s), as for `audiomentations.ApplyImpulseResponse`.
+        clip_samples (int): Length of the clips the spectra are computed for.
+        sample_rate (int, optional): Sample rate of the clips. Defaults to 16000.
+        cache_dir (str | None, optional): Directory of the spectra files. Defaults to a directory in the system's temporary directory.
+    """
+
+    def __init__(self, ir_path, clip_samples: int, sample_rate: int = 16000, cache_dir: str | None = None):
+        self.paths = [str(path) for path in find_audio_files_in_paths(ir_path)]
+        if not self.paths:
+            raise ValueError(f"No impulse response files found in {ir_path}")
+        if clip_samples <= 0:
+            raise ValueError(f"clip_samples must be positive, got {clip_samples}")
+        self.positions = {path: i for i, path in enumerate(self.paths)}
+
+        self.sample_rate = sample_rate
+        self.clip_samples = clip_samples
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), "impulse_response_spectra")
+        files = [[path, os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in self.paths]
+        key = json.dumps([files, clip_samples, sample_rate])
+        self.spectra_path = os.path.join(cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.npy")
+        self.lengths_path = self.spectra_path[: -len(".npy")] + ".lengths.npy"
+
+        if not os.path.exists(self.spectra_path):
+            self._build(cache_dir)
+        self._open()
+
+    def _build(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        impulse_responses = [decode_clip(path, self.sample_rate) for path in self.paths]
+        lengths = np.array([len(ir) for ir in impulse_responses], dtype=np.int64)
+        fft_size = fft.next_fast_len(self.clip_samples + int(lengths.max()) - 1, real=True)
+
+        # both files are written aside and swapped in, the lengths first: a spectra file is only ever seen complete and with its lengths
+        fd, lengths_scratch = tempfile.mkstemp(suffix=".npy.tmp", dir=cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, lengths)
+        fd, spectra_scratch = tempfile.mkstemp(suffix=".npy.tmp", dir=cache_dir)
+        os.close(fd)
+        spectra = np.lib.format.open_memmap(spectra_scratch, mode="w+", dtype=np.complex64, shape=(len(self.paths), fft_size // 2 + 1))
+        for i, ir in enumerate(impulse_responses):
+            spectra[i] = fft.rfft(ir, n=fft_size)
+        spectra.flush()
+        del spectra
+
+        os.replace(lengths_scratch, self.lengths_path)
+        os.replace(spectra_scratch, self.spectra_path)
+
+    def _open(self):
+        self.lengths = np.load(self.lengths_path)
+        self.spectra = np.load(self.spectra_path, mmap_mode="r")
+        self.fft_size = fft.next_fast_len(self.clip_samples + int(self.lengths.max()) - 1, real=True)
+
+    def __getstate__(self):
+        # workers map the spectra file, the arrays are not pickled
+        state = self.__dict__.copy()
+        del state["spectra"], state["lengths"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def convolve(self, samples: np.ndarray, index: int, leave_length_unchanged: bool = True) -> np.ndarray:
+        """Reverberates one clip, like `audiomentations.ApplyImpulseResponse`.
+
+        The full convolution is scaled to a peak of 0.5 and, if `leave_length_unchanged`, its tail is cut to the clip's length.
+
+        Args:
+            samples (numpy.ndarray): The clip's samples, at most `clip_samples` of them.
+            index (int): Index of the impulse response.
+            leave_length_unchanged (bool, optional): Cut the reverb tail. Defaults to True.
+
+        Returns:
+            numpy.ndarray: The reverberated clip.
+        """
+        num_samples = len(samples)
+        self._check_length(num_samples)
+        full_samples = num_samples + int(self.lengths[index]) - 1
+        signal_ir = fft.irfft(fft.rfft(samples, n=self.fft_size) * self.spectra[index], n=self.fft_size)[:full_samples]
+        return self._normalize(signal_ir[None], num_samples if leave_length_unchanged else full_samples)[0]
+
+    def convolve_batch(self, batch: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Reverberates every row of a (batch, samples) array with its own impulse response, cutting the reverb tails.
+
+        Args:
+            batch (numpy.ndarray): Clips of at most `clip_samples` samples.
+            indices (numpy.ndarray): Index of the impulse response of every row.
+
+        Returns:
+            numpy.ndarray: The reverberated (batch, samples) clips.
+        """
+        num_samples = batch.shape[1]
+        self._check_length(num_samples)
+
+        spectra = fft.rfft(batch, n=self.fft_size, axis=1)
+        spectra *= self.spectra[indices]
+        signal_ir = fft.irfft(spectra, n=self.fft_size, axis=1)
+
+        # the peak is taken over the full convolution, tail included
+        full_samples = num_samples + self.lengths[indices] - 1
+        signal_ir[np.arange(self.fft_size) >= full_samples[:, None]] = 0.0
+        return self._normalize(signal_ir, num_samples)
+
+    def _check_length(self, num_samples: int):
+        # a longer clip would wrap around the FFT size and alias its reverb tail
+        if num_samples > self.clip_samples:
+            raise ValueError(
+                f"The impulse response spectra were computed for clips of up to {self.clip_samples} samples, got {num_samples}."
+                " Pass the augmented clip length as clip_samples."
+            )
+
+    @staticmethod
+    def _normalize(signal_ir, num_samples):
+        max_value = np.max(np.abs(signal_ir), axis=1)
+        scale = np.where(max_value > 0.0, 0.5 / np.where(max_value > 0.0, max_value, 1.0), 1.0)
+        return (signal_ir[:, :num_samples] * scale[:, None]).astype(np.float32)
+
+
+class ApplyPrecomputedImpulseResponse(BaseWaveformTransform):
+    """Convolves the audio with a random impulse response, like `audiomentations.ApplyImpulseResponse`, using precomputed spectra.
+
+    Meant for the fixed size clips of `Augmentation`: spectra are computed once for clips of up to `clip_samples` samples, see ImpulseResponseSpectra, and longer clips raise a ValueError. `BatchAugmenter` convolves whole batches with it.
+    """
+
+    supports_multichannel = False
+
+    def __init__(
+        self,
+        ir_path=None,
+        clip_samples: int | None = None,
+        p: float = 0.5,
+        leave_length_unchanged: bool = True,
+        sample_rate: int = 16000,
+        spectra: ImpulseResponseSpectra | None = None,
+        cache_dir: str | None = None,
+    ):
+        """
+        :param ir_path: Impulse response file(s) and/or folder(s)
+        :param clip_samples: Length of the augmented clips the spectra are computed for, required with ir_path
+        :param p: The probability of applying this transform
+        :param leave_length_unchanged: When True, the reverb tail is cut so the output has the input's length
+        :param sample_rate: Sample rate of the clips
+        :param spectra: An existing bank of spectra to share, instead of ir_path
+        :param cache_dir: Directory of the spectra files, see ImpulseResponseSpectra
+        """
+        super().__init__(p)
+        if spectra is None:
+            if clip_samples is None:
+                raise ValueError("clip_samples, the length of the augmented clips, is required to precompute the impulse response spectra")
+            spectra = ImpulseResponseSpectra(ir_path, clip_samples, sample_rate, cache_dir)
+        self.spectra = spectra
+        self.leave_length_unchanged = leave_length_unchanged
+
+    def randomize_parameters(self, samples: NDArray[np.float32], sample_rate: int):
+        super().randomize_parameters(samples, sample_rate)
+        if self.parameters["should_apply"]:
+            self.parameters["ir_file_path"] = random.choice(self.spectra.paths)
+
+    def apply(self, samples: NDArray[np.float32], sample_rate: int):
+        if sample_rate != self.spectra.sample_rate:
+            raise ValueError(f"The impulse responses are at {self.spectra.sample_rate} Hz, got {sample_rate} Hz")
+        index = self.spectra.positions[self.parameters["ir_file_path"]]
+        return self.spectra.convolve(samples, index, self.leave_length_unchanged)
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+
+class ClipSampler:
+    """Draws clip indices without replacement, reshuffled every epoch.
+
+    Every epoch is a permutation of all indices, seeded by (seed, epoch), so the same seed and epoch always give the same order. With weights, the permutation is weighted (Efraimidis-Spirakis): heavier clips tend to come first, so taking the first N indices samples N distinct clips proportionally to their weights. Clips of weight 0 are never drawn, so weighted epochs only hold the clips of positive weight. Shards split the permutation of an epoch into disjoint parts, one per worker or node; all shards must use the same seed.
+
+    Args:
+        num_clips (int): Number of clips to sample from.
+        seed (int | None, optional): Seed of the permutations. Required when sharding. Defaults to None.
+        shard_index (int, optional): Index of this shard. Defaults to 0.
+        num_shards (int, optional): Total number of shards. Defaults to 1.
+        weights (numpy.ndarray | None, optional): Non negative sampling weight of every clip. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        num_clips: int,
+        seed: int | None = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        weights: np.ndarray | None = None,
+    ):
+        if num_shards > 1 and seed is None:
+            raise ValueError("Sharded sampling needs a seed shared by all the shards")
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"Invalid shard {shard_index} of {num_shards}")
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            if weights.shape != (num_clips,) or np.any(weights < 0):
+                raise ValueError("weights must be one non negative value per clip")
+
+        self.num_clips = num_clips
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.weights = weights
+
+    def epoch(self, epoch: int = 0, max_clips: int = math.inf) -> np.ndarray:
+        """Returns the indices of this shard for the given epoch.
+
+        Args:
+            epoch (int, optional): The epoch number. Defaults to 0.
+            max_clips (int, optional): The maximum number of indices returned. Defaults to math.inf.
+
+        Returns:
+            numpy.ndarray: The clip indices, without repetitions.
+        """
+        rng = np.random.default_rng([self.seed, epoch])
+        if self.weights is None:
+            order = rng.permutation(self.num_clips)
+        else:
+            # keys log(u) / w: sorting them in decreasing order is weighted sampling without replacement.
+            # Clips of weight 0 would get a key of -inf or nan and still come last, so they are left out
+            candidates = np.flatnonzero(self.weights > 0)
+            with np.errstate(divide="ignore"):
+                keys = np.log(rng.random(self.num_clips)[candidates]) / self.weights[candidates]
+            order = candidates[np.argsort(-keys, kind="stable")]
+
+        indices = order[self.shard_index :: self.num_shards]
+        if max_clips < len(indices):
+            indices = indices[: int(max_clips)]
+        return indices
+
+    @staticmethod
+    def balanced_weights(labels) -> np.ndarray:
+        """Weights that give every class the same total weight.
+
+        Args:
+            labels (array-like): Class label of every clip.
+
+        Returns:
+            numpy.ndarray: Weight of every clip, the inverse of the size of its class.
+        """
+        _, inverse, counts = np.unique(np.asarray(labels), return_inverse=True, return_counts=True)
+        return 1.0 / counts[inverse]
@@ -0,0 +1,84 @@
+import numpy as np
+import soundfile as sf
+import soxr
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def window_views(audio: np.ndarray, window_samples: int, hop_samples: int, offset: int = 0) -> np.ndarray:
+    """Splits audio in fixed size windows without copying it.
+
+    Args:
+        audio (numpy.ndarray): The audio samples.
+        window_samples (int): Length of the windows.
+        hop_samples (int): Distance between the starts of consecutive windows. Windows overlap if it is shorter than `window_samples`.
+        offset (int, optional): Start of the first window. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: Read-only (windows, window_samples) strided view of the audio. Incomplete windows at the end are dropped.
+    """
+    audio = audio[offset:]
+    if audio.shape[0] < window_samples:
+        return np.empty((0, window_samples), dtype=audio.dtype)
+    return sliding_window_view(audio, window_samples)[::hop_samples]
+
+
+def stream_windows(
+    path: str,
+    window_samples: int,
+    hop_samples: int,
+    offset: int = 0,
+    sample_rate: int = 16000,
+    block_size: int = 1 << 18,
+):
+    """A Python generator that reads an audio file block by block and yields its windows, see `window_views`.
+
+    The file is mixed to mono and resampled to `sample_rate` on the fly, so memory depends on the block size and not on the file duration. Each window is a view of the block it was cut from.
+
+    Args:
+        path (str): Path to the audio file.
+        window_samples (int): Length of the windows, at `sample_rate`.
+        hop_samples (int): Distance between the starts of consecutive windows.
+        offset (int, optional): Start of the first window. Defaults to 0.
+        sample_rate (int, optional): Sample rate of the windows. Defaults to 16000.
+        block_size (int, optional): Number of frames read from the file at a time. Defaults to 262144.
+
+    Yields:
+        tuple: The window's samples and its start sample.
+    """
+    file_sample_rate = sf.info(path).samplerate
+    resampler = None
+    if file_sample_rate != sample_rate:
+        resampler = soxr.ResampleStream(file_sample_rate, sample_rate, 1, dtype="float32", quality="HQ")
+
+    # pending holds the samples from `start` on that are still needed by the next windows
+    pending = np.empty(0, dtype=np.float32)
+    start = 0
+    skip = offset
+
+    def resampled_blocks():
+        for block in sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True):
+            block = block.mean(axis=1)
+            yield block if resampler is None else resampler.resample_chunk(block)
+        if resampler is not None:
+            yield resampler.resample_chunk(np.empty(0, dtype=np.float32), last=True)
+
+    for block in resampled_blocks():
+        if skip:
+            dropped = min(skip, block.shape[0])
+            block = block[dropped:]
+            skip -= dropped
+            start += dropped
+
+        # a new array every block, so the windows already yielded are never overwritten
+        pending = np.concatenate([pending, block]) if pending.shape[0] else block
+        windows = window_views(pending, window_samples, hop_samples)
+        for i, window in enumerate(windows):
+            yield window, start + i * hop_samples
+
+        # with hops longer than the windows, the gap after the last window is skipped in the next blocks
+        consumed = windows.shape[0] * hop_samples
+        skip += max(consumed - pending.shape[0], 0)
+        consumed = min(consumed, pending.shape[0])
+        pending = pending[consumed:]
+        start += consumed
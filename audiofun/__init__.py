@@ -1 +1,4 @@
-from .core import AudioFun
\ No newline at end of file
+from .core import AudioFun
+from .batch import AudioFunBatch
+from .stream import AudioFunStream
+from .irbank import ImpulseResponseBank
\ No newline at end of file
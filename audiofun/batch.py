@@ -0,0 +1,201 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+from scipy.io import wavfile
+
+from .core import AudioFun
+from .filters import apply_filter
+from .profiling import profiled
+
+
+class AudioFunBatch(AudioFun):
+    """
+    Many clips processed as one AudioFun.
+
+    The clips are packed into a single zero-padded (max_length, n_columns) array, one column
+    per clip channel, stored channel-contiguous. Since every AudioFun effect works along the
+    time axis for all channels at once, each effect of a chain runs once for the whole batch
+    (one filter design, one vectorized call). The causal effects (filters, convolution,
+    flutter, pointwise effects) leave the valid part of each clip unaffected by the padding.
+    Zero-phase filters also run backward, so they filter every clip over its own length
+    (one call per distinct length).
+    Peak normalization is done per clip. When an effect changes the length of the audio
+    (downsample, resample_to...) the clip lengths are rescaled proportionally.
+    `make_loop` loops the padded batch and is not meaningful here.
+
+    Parameters:
+        clips (List[np.ndarray]): Clips, (n_samples,) or (n_samples, n_channels)
+        sample_rate (int): Sample rate shared by all the clips (default: 44100)
+        lazy (boolean): See AudioFun (default: False)
+        filenames (List[str]): Source file of each clip, if any
+    """
+
+    def __init__(self, clips: List[np.ndarray], sample_rate=44100, lazy=False, filenames=None):
+        widths = [1 if np.ndim(c) < 2 else c.shape[1] for c in clips]
+        self.offsets = np.concatenate([[0], np.cumsum(widths)]).astype(int)
+        self.lengths = np.array([len(c) for c in clips], dtype=int)
+        self.filenames = filenames
+
+        dtype = np.result_type(*clips)
+        padded = np.zeros((int(self.lengths.max(initial=0)), self.offsets[-1]), dtype=dtype, order="F")
+        for i, clip in enumerate(clips):
+            padded[: len(clip), self.offsets[i] : self.offsets[i + 1]] = np.reshape(clip, (len(clip), -1))
+
+        super().__init__(padded, sample_rate, lazy)
+
+
+    @staticmethod
+    def from_files(filenames: List[str], mmap=False):
+        """
+        Load WAV files sharing the same sample rate into one batch
+
+        Parameters:
+            filenames (List[str]): Paths of the WAV files.
+            mmap (boolean): Memory-map the files while packing them (default: False)
+        """
+        clips = []
+        sample_rate = None
+        for filename in filenames:
+            sr, audio = wavfile.read(filename, mmap=mmap)
+            if sample_rate is not None and sr != sample_rate:
+                raise ValueError(f"{filename} has sample rate {sr}, expected {sample_rate}")
+            sample_rate = sr
+            clips.append(audio)
+        return AudioFunBatch(clips, sample_rate, filenames=list(filenames))
+
+
+    @AudioFun.audio.setter
+    def audio(self, audio):
+        previous = len(self._audio)
+        AudioFun.audio.fset(self, audio)
+        if previous and len(audio) != previous:
+            self.lengths = np.minimum(np.ceil(self.lengths * len(audio) / previous).astype(int), len(audio))
+
+
+    def _state(self):
+        return super()._state() + (self.lengths.copy(),)
+
+
+    def _restore(self, state):
+        # the audio setter rescales the lengths, the snapshot's ones are set after it
+        super()._restore(state[:2])
+        self.lengths = state[2].copy()
+
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+    def clip_audio(self, index: int) -> np.ndarray:
+        """
+        Audio of one clip, a view on the batch trimmed to the clip length.
+
+        Parameters:
+            index (int): Index of the clip
+        """
+        columns = self.audio[: self.lengths[index], self.offsets[index] : self.offsets[index + 1]]
+        return columns[:, 0] if columns.shape[1] == 1 else columns
+
+
+    def _filter(self, sos, zero_phase):
+        if not zero_phase:
+            return super()._filter(sos, zero_phase)
+        # the backward pass would carry the padding into the tail of the shorter clips
+        audio = self.audio
+        filtered = np.zeros(audio.shape, dtype=np.result_type(audio.dtype, sos.dtype), order="F")
+        column_lengths = np.repeat(self.lengths, np.diff(self.offsets))
+        for length in np.unique(column_lengths[column_lengths > 0]):
+            columns = np.flatnonzero(column_lengths == length)
+            filtered[:length, columns] = apply_filter(audio[:length, columns], sos, zero_phase)
+        self.audio = filtered
+
+
+    def _clip_peaks(self) -> np.ndarray:
+        # peak of each column over the valid part of its clip, then reduced per clip
+        audio = self.audio
+        clip_of_column = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        column_peaks = np.array([
+            np.max(np.abs(audio[: self.lengths[clip], column]), initial=0)
+            for column, clip in enumerate(clip_of_column)
+        ])
+        peaks = np.maximum.reduceat(column_peaks, self.offsets[:-1])
+        return peaks, clip_of_column
+
+
+    @profiled
+    def normalize_to_peak_db(self, peak_db=-3.0):
+        """
+        Scales every clip so that its peak reaches the target dB level.
+
+        Parameters:
+            peak_db (float): Target peak in decibels (default: -3 dBFS).
+        """
+        peaks, clip_of_column = self._clip_peaks()
+        scale = np.where(peaks > 0, 10 ** (peak_db / 20) / np.where(peaks > 0, peaks, 1), 1.0)
+        self.audio = self.audio * scale[clip_of_column]
+        return self
+
+
+    @profiled
+    def normalize(self, max_interval=32767):
+        """
+        Normalizes every clip in a custom interval
+
+        Parameters:
+            max_interval (int): Max absolute interval (default=32767)
+        """
+        peaks, clip_of_column = self._clip_peaks()
+        # silent clips are left unchanged (they are all zeros), like in normalize_to_peak_db
+        peaks = np.where(peaks > 0, peaks, 1.0)
+        self.audio = ((self.audio / peaks[clip_of_column]) * max_interval).astype(np.int16)
+        return self
+
+
+    @profiled
+    def save_audio(self, filenames, clip=False, chunk_size=65536):
+        """
+        Save every clip to its own file
+
+        Parameters:
+            filenames (List[str] | str): One name per clip, or a directory where the clips are
+                saved with the name of their source file.
+            clip (boolean): Apply clipping (default: False)
+            chunk_size (int): Number of frames written at a time (default: 65536)
+        """
+        if isinstance(filenames, str):
+            filenames = [os.path.join(filenames, os.path.basename(f)) for f in self.filenames]
+        for index, filename in enumerate(filenames):
+            AudioFun(self.clip_audio(index), self.sample_rate).save_audio(filename, clip, chunk_size)
+        return self
+
+
+    @staticmethod
+    def map_files(
+        chain: Callable[[AudioFun], AudioFun],
+        filenames: List[str],
+        output_filenames: List[str],
+        processes=None,
+        clip=False,
+    ):
+        """
+        Apply a chain to every file in a process pool, one AudioFun per file.
+        For chains that can not be vectorized across clips (make_loop, different lengths out...).
+
+        Parameters:
+            chain (Callable): Function taking and returning an AudioFun, must be picklable (module level)
+            filenames (List[str]): Paths of the input WAV files.
+            output_filenames (List[str]): Paths of the output WAV files.
+            processes (int): Number of worker processes (default: os.cpu_count())
+            clip (boolean): Apply clipping when saving (default: False)
+        """
+        # spawn: forking a process that already runs numba's parallel kernels is not safe
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(_apply_chain, [chain] * len(filenames), filenames, output_filenames, [clip] * len(filenames)))
+
+
+def _apply_chain(chain, filename, output_filename, clip):
+    chain(AudioFun.from_file(filename)).save_audio(output_filename, clip)
+    return output_filename
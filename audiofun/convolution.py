@@ -0,0 +1,124 @@
+import numpy as np
+from scipy import fft
+
+from .processor import BlockProcessor
+
+
+def partition_spectra(impulse_response: np.ndarray, partition_size=4096) -> np.ndarray:
+    """
+    Spectra of the impulse response split in partitions, as used by PartitionedConvolver.
+
+    Parameters:
+        impulse_response (np.ndarray): Impulse response (1-D)
+        partition_size (int): Size of the partitions in samples (default: 4096)
+    """
+    impulse_response = np.asarray(impulse_response, dtype=np.float64)
+    n_partitions = max(int(np.ceil(len(impulse_response) / partition_size)), 1)
+    partitions = np.zeros((n_partitions, partition_size))
+    partitions.flat[: len(impulse_response)] = impulse_response
+    return fft.rfft(partitions, n=2 * partition_size, axis=1)
+
+
+class PartitionedConvolver(BlockProcessor):
+    """
+    Uniformly partitioned overlap-save convolution.
+
+    The impulse response is split into partitions of `partition_size` samples whose spectra
+    are computed once. Every incoming partition of audio costs one forward FFT, one
+    multiply-accumulate against the spectra of the previous input partitions (frequency
+    domain delay line) and one inverse FFT, all of the same size so that scipy can reuse
+    its cached FFT plan. Tails are carried in the delay line, so blocks of any length can be
+    pushed through `process` and the result is the same as a single full convolution
+    truncated to the input length. Time is on axis 0, extra axes are treated as channels.
+    Being truncated, the output holds no tail, so `flush` returns nothing.
+
+    Parameters:
+        impulse_response (np.ndarray): Impulse response to convolve with (1-D)
+        partition_size (int): Size of the partitions in samples (default: 4096)
+        spectra (np.ndarray | None): Precomputed partition_spectra of the impulse response,
+            in which case impulse_response is ignored (default: None)
+    """
+
+    def __init__(self, impulse_response: np.ndarray, partition_size=4096, spectra=None):
+        self.partition_size = partition_size
+        self.fft_size = 2 * partition_size
+        if spectra is None:
+            spectra = partition_spectra(impulse_response, partition_size)
+        self.spectra = spectra
+        self.n_partitions = len(spectra)
+
+        self.buffer = None
+        self.delay_line = None
+        self.past = None
+        self.index = 0
+        self.fill = 0
+
+
+    def _reset(self, channel_shape):
+        # channels first, so that every FFT runs over contiguous memory
+        n_channels = int(np.prod(channel_shape))
+        n_bins = self.fft_size // 2 + 1
+        self.buffer = np.zeros((n_channels, self.fft_size))
+        self.delay_line = np.zeros((self.n_partitions, n_channels, n_bins), dtype=complex)
+        self.past = np.zeros((n_channels, n_bins), dtype=complex)
+        self.index = 0
+        self.fill = 0
+
+
+    def _advance(self):
+        # the current partition is complete: slide the input buffer, move to the next
+        # slot of the delay line and precompute the contribution of all past partitions
+        size = self.partition_size
+        self.buffer[:, :size] = self.buffer[:, size:]
+        self.buffer[:, size:] = 0
+        self.index = (self.index + 1) % self.n_partitions
+        self.delay_line[self.index] = 0
+        self.fill = 0
+
+        order = (self.index - np.arange(self.n_partitions)) % self.n_partitions
+        self.past = np.einsum("pcf,pf->cf", self.delay_line, self.spectra[order])
+
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.buffer is None:
+            self._reset(block.shape[1:])
+
+        size = self.partition_size
+        frames = block.reshape(len(block), -1)
+        out = np.empty(frames.shape, dtype=np.result_type(block.dtype, np.float32))
+        pos = 0
+        while pos < len(block):
+            take = min(size - self.fill, len(block) - pos)
+            start = size + self.fill
+            self.buffer[:, start : start + take] = frames[pos : pos + take].T
+
+            # samples of the current partition that did not arrive yet are zero, which
+            # leaves the output up to the last received sample exact (causality)
+            spectrum = fft.rfft(self.buffer, axis=-1)
+            self.delay_line[self.index] = spectrum
+            y = fft.irfft(self.past + spectrum * self.spectra[0], n=self.fft_size, axis=-1)
+            out[pos : pos + take] = y[:, start : start + take].T
+
+            self.fill += take
+            pos += take
+            if self.fill == size:
+                self._advance()
+
+        return out.reshape(block.shape)
+
+
+    def flush(self):
+        # the output is truncated to the input length, there is no tail to emit
+        return None
+
+
+def partitioned_convolve(audio: np.ndarray, impulse_response: np.ndarray, partition_size=4096):
+    """
+    Convolve audio with an impulse response, truncated to the length of the audio.
+
+    Parameters:
+        audio (np.ndarray): Audio to convolve (time on axis 0)
+        impulse_response (np.ndarray): Impulse response (1-D)
+        partition_size (int): Size of the partitions in samples (default: 4096)
+    """
+    return PartitionedConvolver(impulse_response, partition_size).process(np.asarray(audio))
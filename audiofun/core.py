@@ -1,34 +1,193 @@
+import copy
+
 import numpy as np
 from scipy.io import wavfile
 from scipy import stats
 from scipy.signal import fftconvolve
-from scipy.signal import butter, lfilter
-from scipy.signal import resample
+
+from . import jit
+from . import lazy as ops
+from .convolution import partitioned_convolve
+from .filters import apply_filter, design_filter
+from .layout import channel_contiguous
+from .profiling import Profiler, profiled
+from .resample import resample
+from .stream import AudioFunStream, WowFlutter
+from .wav import WavWriter
+
+def _read_only(audio) -> np.ndarray:
+    # a view sharing the buffer, that can not be written through
+    view = np.asarray(audio).view()
+    view.flags.writeable = False
+    return view
+
 
 class AudioFun:
 
-    audio: np.ndarray
     original_audio: np.ndarray
     sample_rate: int
+    lazy: bool
 
-    def __init__(self, audio, sample_rate = 44100):
-        self.audio = audio
-        self.original_audio = audio
+    def __init__(self, audio, sample_rate = 44100, lazy=False):
+        """
+        Parameters:
+            audio (np.ndarray): Audio samples (time on axis 0)
+            sample_rate (int): Sample rate (default: 44100)
+            lazy (boolean): Record pointwise effects (gain, bitcrush, saturate, clip) and run
+                them fused in a single float32 pass the next time `audio` is read (default: False)
+        """
+        self._audio = audio
+        self._pending = []
+        # effects never write into their input, so snapshots are read-only views of the
+        # buffers they refer to instead of copies
+        self.original_audio = _read_only(audio)
+        self.original_sample_rate = sample_rate
+        self._checkpoints = {}
         self.sample_rate = sample_rate
+        self.lazy = lazy
+        self.profiler = None
+        self._original_state = self._state()
+
+
+    @property
+    def channels(self) -> int:
+        audio = self._audio
+        return 1 if np.ndim(audio) < 2 else audio.shape[1]
+
+
+    @property
+    def audio(self) -> np.ndarray:
+        if self._pending:
+            self._audio = ops.fuse(self._audio, self._pending)
+            self._pending = []
+        return self._audio
+
+
+    @audio.setter
+    def audio(self, audio):
+        self._audio = audio
+        self._pending = []
+
+
+    def _defer(self, op, *args):
+        self._pending.append((op, args))
+        return self
     
     
     @staticmethod
-    def read_file(filename):
-        return wavfile.read(filename)
+    def read_file(filename, mmap=False):
+        return wavfile.read(filename, mmap=mmap)
 
 
     @staticmethod
-    def from_file(filename):
-        sr, audio = wavfile.read(filename)
+    def from_file(filename, mmap=False):
+        """
+        Load a WAV file
+
+        Parameters:
+            filename (str): Path of the WAV file.
+            mmap (boolean): Memory-map the samples instead of reading them: the audio is a
+                zero-copy (copy-on-write) view of the file, pages are only read when used (default: False)
+        """
+        sr, audio = wavfile.read(filename, mmap=mmap)
         return AudioFun(audio, sr)
 
 
+    @staticmethod
+    def stream(filename, block_size=65536):
+        """
+        Record an effect chain to be rendered block by block from file to file.
+        See AudioFunStream.
+
+        Parameters:
+            filename (str): Path of the audio file to read.
+            block_size (int): Number of frames processed per block (default: 65536)
+        """
+        return AudioFunStream(filename, block_size)
+
+
+    # SNAPSHOTS
+    def _state(self):
+        # what a snapshot remembers, subclasses add the attributes that follow the audio
+        return _read_only(self.audio), self.sample_rate
+
+
+    def _restore(self, state):
+        self.audio, self.sample_rate = state
+
+
+    def checkpoint(self, name="default"):
+        """
+        Remember the current audio, as a read-only view (no copy).
+
+        Parameters:
+            name (str): Name of the checkpoint (default: "default")
+        """
+        self._checkpoints[name] = self._state()
+        return self
+
+
+    def reset(self, name=None):
+        """
+        Go back to a checkpoint, or to the original audio. The audio becomes a read-only
+        view of the snapshot: the next effect allocates its own output as usual.
+
+        Parameters:
+            name (str | None): Name of the checkpoint, None for the original audio (default: None)
+        """
+        self._restore(self._original_state if name is None else self._checkpoints[name])
+        return self
+
+
+    def fork(self):
+        """
+        New AudioFun starting from the current audio, sharing its buffer (read-only) and
+        checkpoints, to branch several variants off one loaded file without copying it.
+        Pending lazy effects are carried over, profiling is not.
+        """
+        forked = copy.copy(self)
+        forked._audio = _read_only(self._audio)
+        forked._pending = list(self._pending)
+        forked._checkpoints = dict(self._checkpoints)
+        forked.profiler = None
+        return forked
+
+
+    # PROFILING
+    def enable_profiling(self, callback=None, memory=True):
+        """
+        Record wall time, CPU time, peak allocation and audio sizes of every method call.
+        See `profiling_report`.
+
+        Parameters:
+            callback (Callable | None): Called with the record of each step, e.g. to push it to a metrics pipeline
+            memory (boolean): Trace peak allocations with tracemalloc, which slows allocations down (default: True)
+        """
+        self.profiler = Profiler(callback, memory)
+        return self
+
+
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+        self.profiler = None
+        return self
+
+
+    def profiling_report(self, table=False):
+        """
+        Report of the profiled steps
+
+        Parameters:
+            table (boolean): Return a printable table instead of a dict (default: False)
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.table() if table else self.profiler.report()
+
+
     # UTILITY METHODS
+    @profiled
     def get_audio_channel(self, channel=0):
         """
         Get a single audio channel from the current audio.
@@ -43,6 +202,18 @@ class AudioFun:
         return self
 
 
+    def split_channels(self):
+        """
+        Split the current audio in one AudioFun per channel (views, no copy).
+        Every effect works on (n_samples, n_channels) audio, so this is only needed
+        to save or process the channels separately.
+        """
+        audio = self.audio
+        if audio.ndim < 2:
+            return [AudioFun(audio, self.sample_rate, self.lazy)]
+        return [AudioFun(audio[:, c], self.sample_rate, self.lazy) for c in range(audio.shape[1])]
+
+
     def set_sample_rate(self, sr: int):
         """
         Set the sample rate of the current audio (watch out!).
@@ -54,22 +225,28 @@ class AudioFun:
         return self
 
 
-    def save_audio(self, filename: str, clip=False):
+    @profiled
+    def save_audio(self, filename: str, clip=False, chunk_size=65536):
         """
-        Save audio to file
+        Save audio to file, streaming it to disk chunk by chunk
 
         Parameters:
             filename (str): Name of the file to save.
-            clip (boolean): Apply clipping (default: False)
+            clip (boolean): Apply clipping and convert to int16 (default: False)
+            chunk_size (int): Number of frames converted and written at a time (default: 65536)
         """
         audio = self.audio
-        if clip:
-            audio = np.clip(audio, -1.0, 1.0)
-            audio = (audio * 32767).astype(np.int16)
-        wavfile.write(filename, self.sample_rate, audio)
+        dtype = np.int16 if clip else audio.dtype
+        with WavWriter(filename, self.sample_rate, self.channels, dtype) as writer:
+            for start in range(0, len(audio), chunk_size):
+                chunk = audio[start : start + chunk_size]
+                if clip:
+                    chunk = np.clip(chunk, -1.0, 1.0) * 32767
+                writer.write(chunk)
         return self
 
 
+    @profiled
     def normalize_to_peak_db(self, peak_db=-3.0):
         """
         Scales audio so that its peak reaches the target dB level.
@@ -81,11 +258,14 @@ class AudioFun:
         if current_peak > 0: # Avoid division by zero
             target_peak_linear = 10 ** (peak_db / 20)
             scale = target_peak_linear / current_peak
+            if self.lazy:
+                return self._defer(ops.gain, scale)
             self.audio = self.audio * scale
         
         return self
 
 
+    @profiled
     def normalize(self, max_interval=32767):
         """
         Normalizes audio in a custom interval
@@ -98,6 +278,7 @@ class AudioFun:
 
 
     # EFFECTS
+    @profiled
     def apply_gain_db(self, gain_db: float):
         """
         Applies gain to an audio signal in decibels.
@@ -106,10 +287,13 @@ class AudioFun:
             gain_db (float): Gain in decibels. Positive = boost, Negative = cut.
         """
         gain_factor = 10 ** (gain_db / 20)
+        if self.lazy:
+            return self._defer(ops.gain, gain_factor)
         self.audio = self.audio * gain_factor
         return self
 
 
+    @profiled
     def bitcrush(self, bit_depth=4):
         """
         Bitcrusher effect
@@ -118,10 +302,16 @@ class AudioFun:
             bit_depth (int)
         """
         max_val = 2 ** (bit_depth - 1)
+        if self.lazy:
+            return self._defer(ops.bitcrush, max_val)
+        if jit.enabled():
+            self.audio = jit.bitcrush(self.audio, max_val)
+            return self
         self.audio = np.round(self.audio * max_val) / max_val
         return self
 
 
+    @profiled
     def wow_flutter(self, depth=0.002, speed=0.5):
         """
         Wow flutter effect
@@ -130,13 +320,11 @@ class AudioFun:
             depth (float): (default: 0.002)
             speed (float): (default: 0.5)
         """
-        t = np.linspace(0, len(self.audio) / self.sample_rate, len(self.audio))
-        mod = 1 + depth * np.sin(2 * np.pi * speed * t)
-        indices = np.clip((np.arange(len(self.audio)) * mod).astype(int), 0, len(self.audio) - 1)
-        self.audio = self.audio[indices]
+        self.audio = WowFlutter(depth, speed, self.sample_rate).process(self.audio)
         return self
 
 
+    @profiled
     def make_loop(self, loop_len_sec, n=5, starting_sample_index=0):
         """
         Loop audio
@@ -148,41 +336,45 @@ class AudioFun:
         """
         
         loop_samples = int(loop_len_sec * self.sample_rate)
-        loop = np.tile(self.audio[starting_sample_index:loop_samples], n)  # n loops
+        audio = self.audio
+        loop = np.tile(audio[starting_sample_index:loop_samples], (n,) + (1,) * (audio.ndim - 1))  # n loops
         self.audio = loop
         return self
 
 
+    @profiled
     def apply_convolution(self, signal: np.ndarray):
         """
         Apply convolution with a signal
 
         Parameters:
-            signal (np.ndarray): Signal to convolve the audio with
+            signal (np.ndarray): Signal to convolve the audio with (1-D, or one column per channel)
         """
-        self.audio = fftconvolve(self.audio, signal, mode="full")[: len(self.audio)]
+        audio = channel_contiguous(self.audio)
+        signal = np.asarray(signal)
+        if signal.ndim < audio.ndim:
+            signal = signal.reshape(signal.shape + (1,) * (audio.ndim - signal.ndim))
+        self.audio = fftconvolve(audio, signal, mode="full", axes=0)[: len(audio)]
         return self
 
 
+    @profiled
     def apply_batch_convolution(self, impulse_response, batch_size_ms):
         """
-        Apply 'batch' convolution with a signal
+        Apply 'batch' convolution with a signal, using uniformly partitioned overlap-save
+        (the impulse response is split in partitions of one batch, tails are carried across batches)
 
         Parameters:
-            signal (np.ndarray): Signal to convolve the audio with
+            impulse_response (np.ndarray): Signal to convolve the audio with
             batch_size_ms (int): Size of the batch to use for convolution with the signal (in milliseconds)
             
         """
-        reconstructed_audio = []
-        batch_size_samples = round(self.sample_rate * batch_size_ms * 10 ** (-3))
-        for i in range(round(len(self.audio)/batch_size_samples)):
-            audio_batch = self.audio[batch_size_samples * i : batch_size_samples * (i+1)]
-            convolved_audio_batch = fftconvolve(audio_batch, impulse_response, mode="full")[: len(audio_batch)]
-            reconstructed_audio.extend(convolved_audio_batch)
-        self.audio = reconstructed_audio
+        batch_size_samples = max(round(self.sample_rate * batch_size_ms * 10 ** (-3)), 1)
+        self.audio = partitioned_convolve(self.audio, impulse_response, batch_size_samples)
         return self
 
 
+    @profiled
     def saturate(self, amount=1.5):
         """
         Saturation effect 
@@ -191,11 +383,31 @@ class AudioFun:
             amount (float)
             
         """
+        if self.lazy:
+            return self._defer(ops.saturate, amount)
+        if jit.enabled():
+            self.audio = jit.saturate(self.audio, amount)
+            return self
         self.audio = np.tanh(self.audio * amount)
         return self
 
 
+    @profiled
+    def clip(self, threshold=1.0):
+        """
+        Hard clipping effect
+
+        Parameters:
+            threshold (float): Absolute value the audio is clipped to (default: 1.0)
+        """
+        if self.lazy:
+            return self._defer(ops.clip, -threshold, threshold)
+        self.audio = np.clip(self.audio, -threshold, threshold)
+        return self
+
+
     # SAMPLE RATE
+    @profiled
     def downsample_raw(self, factor):
         """
         Downsample (raw method) by an integer amount
@@ -207,53 +419,91 @@ class AudioFun:
         return self
     
 
-    def downsample(self, new_rate):
+    @profiled
+    def downsample(self, new_rate, backend="auto"):
         """
-        Downsample to a sample rate
-        !! Remember to resample it back to the original sample rate before saving it to wav.
+        Downsample to a sample rate (polyphase or soxr, see audiofun.resample)
+        !! Remember to resample it back to the original sample rate before saving it to wav (see upsample).
 
         Parameters:
             new_rate (int)
+            backend (str): "soxr", "poly" or "auto" (default: "auto")
+        """
+        self.audio = resample(self.audio, self.sample_rate, new_rate, backend)
+        self._downsampled_rate = new_rate
+        return self
+
+
+    @profiled
+    def upsample(self, from_rate=None, backend="auto"):
         """
-        # Normalize to [-1, 1]
-        data_norm = self.audio / np.max(np.abs(self.audio))
+        Resample audio that was downsampled back to the sample rate of the AudioFun
 
-        num_samples = int(len(data_norm) * new_rate / self.sample_rate)
-        self.audio = resample(data_norm, num_samples)
+        Parameters:
+            from_rate (int): Current rate of the audio (default: the rate of the last downsample)
+            backend (str): "soxr", "poly" or "auto" (default: "auto")
+        """
+        if from_rate is None:
+            from_rate = getattr(self, "_downsampled_rate", self.sample_rate)
+        self.audio = resample(self.audio, from_rate, self.sample_rate, backend)
+        self._downsampled_rate = self.sample_rate
+        return self
+
+
+    @profiled
+    def resample_to(self, new_rate, backend="auto"):
+        """
+        Resample to a new sample rate, and set it as the sample rate of the audio
+
+        Parameters:
+            new_rate (int)
+            backend (str): "soxr", "poly" or "auto" (default: "auto")
+        """
+        self.audio = resample(self.audio, self.sample_rate, new_rate, backend)
+        self.sample_rate = new_rate
         return self
 
 
     # FILTERS
     # TODO it's not clear if in lp and hp filters the cutoffs are pass or cut tresholds. in bandpass too.
-    def lowpass(self, cutoff=3000):
+    def _filter(self, sos, zero_phase):
+        self.audio = apply_filter(self.audio, sos, zero_phase)
+
+
+    @profiled
+    def lowpass(self, cutoff=3000, order=4, zero_phase=False):
         """
         Low-Pass filter 
 
         Parameters:
             cutoff (int): Cut-off frequency
+            order (int): Order of the Butterworth filter (default: 4)
+            zero_phase (boolean): Filter forward and backward, no phase shift (default: False)
             
         """
-        nyq = 0.5 * self.sample_rate
-        b, a = butter(4, cutoff / nyq, btype="low")
-        self.audio = lfilter(b, a, self.audio)
+        sos = design_filter("low", order, cutoff, self.sample_rate)
+        self._filter(sos, zero_phase)
         return self
     
 
-    def highpass(self, cutoff):
+    @profiled
+    def highpass(self, cutoff, order=4, zero_phase=False):
         """
         High-Pass filter 
 
         Parameters:
             cutoff (int): Cut-off frequency
+            order (int): Order of the Butterworth filter (default: 4)
+            zero_phase (boolean): Filter forward and backward, no phase shift (default: False)
             
         """
-        nyq = 0.5 * self.sample_rate
-        b, a = butter(4, cutoff / nyq, btype="high")
-        self.audio = lfilter(b, a, self.audioaudio)
+        sos = design_filter("high", order, cutoff, self.sample_rate)
+        self._filter(sos, zero_phase)
         return self
 
 
-    def bandpass_filter(self, lowcut=2000, highcut=10000, order=4):
+    @profiled
+    def bandpass_filter(self, lowcut=2000, highcut=10000, order=4, zero_phase=False):
         """
         Band-Pass filter 
 
@@ -261,12 +511,10 @@ class AudioFun:
             lowcut (int): Low cut-off frequency
             highcut (int): High cut-off frequency
             order (int): Order of the Butterworth filter
+            zero_phase (boolean): Filter forward and backward, no phase shift (default: False)
             
         """
-        nyq = 0.5 * self.sample_rate
-        low = lowcut / nyq
-        high = highcut / nyq
-        b, a = butter(order, [low, high], btype="band")
-        self.audio = lfilter(b, a, self.audio)
+        sos = design_filter("band", order, (lowcut, highcut), self.sample_rate)
+        self._filter(sos, zero_phase)
         return self
 
@@ -0,0 +1,42 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfiltfilt
+
+from .layout import channel_contiguous
+
+
+@lru_cache(maxsize=256)
+def design_filter(btype: str, order: int, cutoffs, sample_rate: int) -> np.ndarray:
+    """
+    Butterworth filter in second-order sections, cached across all callers
+    (the same read-only array is returned to everyone).
+
+    Parameters:
+        btype (str): "low", "high", "band" or "bandstop"
+        order (int): Order of the filter
+        cutoffs (float | tuple): Cut-off frequency, or (low, high) for band filters
+        sample_rate (int): Sample rate of the audio
+    """
+    nyq = 0.5 * sample_rate
+    wn = tuple(c / nyq for c in cutoffs) if isinstance(cutoffs, tuple) else cutoffs / nyq
+    sos = butter(order, wn, btype=btype, output="sos")
+    sos.setflags(write=False)
+    return sos
+
+
+def apply_filter(audio: np.ndarray, sos: np.ndarray, zero_phase=False) -> np.ndarray:
+    """
+    Filter along the time axis (axis 0), all channels in one call.
+
+    Parameters:
+        audio (np.ndarray): Audio to filter
+        sos (np.ndarray): Second-order sections of the filter
+        zero_phase (boolean): Filter forward and backward (default: False)
+    """
+    audio = channel_contiguous(audio)
+    # scipy's sosfilt needs a writable buffer, the cached filters are read-only
+    sos = np.array(sos)
+    if zero_phase:
+        return sosfiltfilt(sos, audio, axis=0)
+    return sosfilt(sos, audio, axis=0)
@@ -0,0 +1,208 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+from scipy.io import wavfile
+
+from .convolution import PartitionedConvolver, partition_spectra
+from .noise import prepare_impulse_response, tile_impulse_response
+from .resample import resample
+
+
+class ImpulseResponseBank:
+    """
+    Impulse responses of a directory, preprocessed once and served from memory.
+
+    Every file is converted to mono float32 (like noise.get_impulse_response) and stored
+    back to back in a single float32 blob on disk, with an index of offsets. The blob is
+    memory-mapped, so opening the bank again (or from many worker processes) costs no decoding
+    and the pages are shared by the OS; it is rebuilt only when the files change.
+
+    Padded and tiled impulse responses and the FFT spectra used by PartitionedConvolver are
+    computed on first use and cached, later calls return read-only views of the cache.
+
+    A rebuild writes new files next to the old ones and swaps them in with os.replace, so
+    processes that still map the previous blob keep reading consistent data.
+
+    Parameters:
+        directory (str): Directory of the impulse responses.
+        pattern (str): Glob pattern of the files in the directory (default: "*.wav")
+        cache_dir (str | None): Where the blob and its index are kept
+            (default: a folder in the temporary directory, derived from `directory`, `pattern`
+            and `sample_rate`)
+        sample_rate (int | None): Resample every impulse response to this rate while building
+            (default: None, keep the rate of each file)
+    """
+
+    def __init__(self, directory: str, pattern="*.wav", cache_dir=None, sample_rate=None):
+        self.directory = os.path.abspath(directory)
+        self.sample_rate = sample_rate
+        if cache_dir is None:
+            key = f"{self.directory}\0{pattern}\0{sample_rate}"
+            digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+            cache_dir = os.path.join(tempfile.gettempdir(), f"audiofun-irbank-{digest}")
+        self.cache_dir = cache_dir
+
+        paths = sorted(glob.glob(os.path.join(self.directory, pattern)))
+        files = [[os.path.basename(path), os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in paths]
+
+        index = self._read_index()
+        if index is None or index["files"] != files or index.get("sample_rate") != sample_rate:
+            index = self._build(paths, files)
+
+        self.names = [name for name, _, _ in files]
+        self.offsets = dict(zip(self.names, index["offsets"]))
+        self.lengths = dict(zip(self.names, index["lengths"]))
+        self.sample_rates = dict(zip(self.names, index["sample_rates"]))
+        total = sum(index["lengths"])
+        self.blob = np.memmap(self._blob_path, dtype=np.float32, mode="r", shape=(total,)) if total else np.zeros(0, np.float32)
+
+        self._tiled = {}
+        self._spectra = {}
+
+
+    @property
+    def _blob_path(self):
+        return os.path.join(self.cache_dir, "irbank.f32")
+
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "irbank.json")
+
+
+    def _read_index(self):
+        if not os.path.exists(self._index_path) or not os.path.exists(self._blob_path):
+            return None
+        with open(self._index_path) as f:
+            index = json.load(f)
+        # between the two swaps of a rebuild the blob can be newer than the index
+        if os.path.getsize(self._blob_path) != 4 * sum(index["lengths"]):
+            return None
+        return index
+
+
+    def _build(self, paths, files):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        sample_rates, irs = [], []
+        for path in paths:
+            sample_rate, ir = wavfile.read(path, mmap=True)
+            ir = prepare_impulse_response(ir)
+            if self.sample_rate is not None and sample_rate != self.sample_rate:
+                ir = resample(ir, sample_rate, self.sample_rate).astype(np.float32, copy=False)
+                sample_rate = self.sample_rate
+            sample_rates.append(int(sample_rate))
+            irs.append(ir)
+
+        lengths = [len(ir) for ir in irs]
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(int).tolist() if irs else []
+
+        # both files are written aside and swapped in, blob first: the index never points
+        # to a blob that is not complete, and mappings of the old blob stay valid
+        fd, blob_scratch = tempfile.mkstemp(suffix=".f32.tmp", dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            for ir in irs:
+                f.write(np.ascontiguousarray(ir, dtype=np.float32).tobytes())
+
+        index = {
+            "files": files,
+            "offsets": offsets,
+            "lengths": lengths,
+            "sample_rates": sample_rates,
+            "sample_rate": self.sample_rate,
+        }
+        fd, index_scratch = tempfile.mkstemp(suffix=".json.tmp", dir=self.cache_dir)
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+
+        os.replace(blob_scratch, self._blob_path)
+        os.replace(index_scratch, self._index_path)
+        return index
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def __contains__(self, name):
+        return name in self.offsets
+
+
+    def __getitem__(self, name) -> np.ndarray:
+        """
+        Preprocessed impulse response, as a read-only view of the blob
+        """
+        offset = self.offsets[name]
+        return self.blob[offset : offset + self.lengths[name]]
+
+
+    def tiled(self, name, length: int, padding_ms=0) -> np.ndarray:
+        """
+        Impulse response padded and tiled to fit `length` samples, see noise.get_impulse_response.
+
+        The tiled buffer of each (name, padding) is kept and only grown when a longer length
+        is asked for, so repeated calls return read-only views of it.
+
+        Parameters:
+            name (str): File name of the impulse response.
+            length (int): Target length in samples
+            padding_ms (float): Zeros appended to the impulse response, in ms (default: 0)
+        """
+        ir = self[name]
+        padding = int(padding_ms * (10 ** (-3)) * self.sample_rates[name])
+        period = len(ir) + padding
+
+        size = length if period >= length else period * (length // period)
+        key = (name, padding)
+        cached = self._tiled.get(key)
+        if cached is None or len(cached) < size:
+            cached = tile_impulse_response(ir, max(length, period), padding)
+            cached.setflags(write=False)
+            self._tiled[key] = cached
+        return cached[:size]
+
+
+    def padded(self, name, padding_ms=0) -> np.ndarray:
+        """
+        Impulse response right padded with padding_ms of silence, as a read-only view
+        """
+        padding = int(padding_ms * (10 ** (-3)) * self.sample_rates[name])
+        return self.tiled(name, self.lengths[name] + padding, padding_ms)
+
+
+    def get_impulse_response(self, name, audio_lenght, ir_right_padding_ms=0):
+        """
+        Drop-in replacement of noise.get_impulse_response served from the bank
+        """
+        return self.sample_rates[name], self.tiled(name, audio_lenght, ir_right_padding_ms)
+
+
+    def spectra(self, name, partition_size=4096, length=None, padding_ms=0) -> np.ndarray:
+        """
+        Partition spectra of an impulse response for PartitionedConvolver, cached per block size.
+
+        Parameters:
+            name (str): File name of the impulse response.
+            partition_size (int): Size of the partitions in samples (default: 4096)
+            length (int | None): Tile the impulse response to this length first (default: None)
+            padding_ms (float): Padding of the tiled impulse response, in ms (default: 0)
+        """
+        key = (name, partition_size, length, padding_ms)
+        spectra = self._spectra.get(key)
+        if spectra is None:
+            ir = self[name] if length is None else self.tiled(name, length, padding_ms)
+            spectra = partition_spectra(ir, partition_size)
+            spectra.setflags(write=False)
+            self._spectra[key] = spectra
+        return spectra
+
+
+    def convolver(self, name, partition_size=4096, length=None, padding_ms=0) -> PartitionedConvolver:
+        """
+        New PartitionedConvolver over the cached spectra of an impulse response
+        """
+        spectra = self.spectra(name, partition_size, length, padding_ms)
+        return PartitionedConvolver(None, partition_size, spectra=spectra)
@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# numba is opt-in: its saturate uses a float32-accurate tanh, the default output stays NumPy's
+_backend = "numpy"
+
+
+def set_backend(backend: str):
+    """
+    Select the backend of the per-sample effects. The default is "numpy"; the numba kernels
+    agree with it to float32 precision.
+
+    Parameters:
+        backend (str): "numba" for the compiled single-pass kernels, "numpy" for the vectorized NumPy path
+    """
+    global _backend
+    if backend not in ("numba", "numpy"):
+        raise ValueError(f"Unknown backend {backend}")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ImportError("numba is not installed")
+    _backend = backend
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def enabled() -> bool:
+    return _backend == "numba"
+
+
+def _as_2d(audio: np.ndarray) -> np.ndarray:
+    # kernels work on (n_samples, n_channels) arrays, in whatever memory layout they come
+    audio = np.asarray(audio)
+    return audio if audio.ndim == 2 else audio.reshape(len(audio), -1)
+
+
+def _flat(audio: np.ndarray) -> np.ndarray:
+    # pointwise kernels do not care about channels: walk the memory in storage order,
+    # which is a view for both interleaved and channel-contiguous audio
+    return np.ravel(audio, order="K")
+
+
+def _float_dtype(audio: np.ndarray):
+    return audio.dtype if np.issubdtype(audio.dtype, np.floating) else np.float64
+
+
+# POINTWISE OP CODES (see fuse)
+GAIN = 0
+BITCRUSH = 1
+SATURATE = 2
+CLIP = 3
+
+
+if NUMBA_AVAILABLE:
+
+    @numba.njit(inline="always", fastmath=True)
+    def _tanh(x):
+        # Rational approximation of tanh accurate to float32 precision (same as Eigen's
+        # fast float tanh). Unlike a call to libm tanh it is plain arithmetic, so the loops
+        # that use it get vectorized.
+        x = min(max(x, -7.90531110763549805), 7.90531110763549805)
+        x2 = x * x
+        p = x2 * -2.76076847742355e-16 + 2.00018790482477e-13
+        p = x2 * p + -8.60467152213735e-11
+        p = x2 * p + 5.12229709037114e-08
+        p = x2 * p + 1.48572235717979e-05
+        p = x2 * p + 6.37261928875436e-04
+        p = x2 * p + 4.89352455891786e-03
+        q = x2 * 1.19825839466702e-06 + 1.18534705686654e-04
+        q = x2 * q + 2.26843463243900e-03
+        q = x2 * q + 4.89352518554385e-03
+        return x * p / q
+
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _bitcrush_kernel(audio, max_val, out):
+        for i in numba.prange(audio.shape[0]):
+            out[i] = np.rint(audio[i] * max_val) / max_val
+
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _saturate_kernel(audio, amount, out):
+        for i in numba.prange(audio.shape[0]):
+            out[i] = _tanh(audio[i] * amount)
+
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _fuse_kernel(audio, codes, params, out, chunk_size):
+        # ops are applied chunk by chunk: the chunk stays in cache and every inner
+        # loop is branch free, so it gets vectorized
+        n_chunks = (audio.shape[0] + chunk_size - 1) // chunk_size
+        for chunk in numba.prange(n_chunks):
+            start = chunk * chunk_size
+            stop = min(start + chunk_size, audio.shape[0])
+            x = audio[start:stop]
+            y = out[start:stop]
+            for i in range(y.shape[0]):
+                y[i] = x[i]
+            for k in range(codes.shape[0]):
+                code = codes[k]
+                a = params[k, 0]
+                b = params[k, 1]
+                if code == GAIN:
+                    for i in range(y.shape[0]):
+                        y[i] = y[i] * a
+                elif code == BITCRUSH:
+                    for i in range(y.shape[0]):
+                        y[i] = np.rint(y[i] * a) / a
+                elif code == SATURATE:
+                    for i in range(y.shape[0]):
+                        y[i] = _tanh(y[i] * a)
+                elif code == CLIP:
+                    for i in range(y.shape[0]):
+                        y[i] = min(max(y[i], a), b)
+
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _wow_flutter_kernel(buffer, start, phase, omega, lag_scale, out):
+        last = buffer.shape[0] - 1
+        for i in numba.prange(out.shape[0]):
+            position = start + i - lag_scale * (1.0 - math.cos(phase + omega * i))
+            if position < 0.0:
+                position = 0.0
+            i0 = int(math.floor(position))
+            frac = position - i0
+            i1 = min(i0 + 1, last)
+            for c in range(buffer.shape[1]):
+                out[i, c] = buffer[i0, c] * (1.0 - frac) + buffer[i1, c] * frac
+
+
+def bitcrush(audio: np.ndarray, max_val) -> np.ndarray:
+    out = np.empty_like(audio, dtype=_float_dtype(audio))
+    _bitcrush_kernel(_flat(audio), max_val, _flat(out))
+    return out
+
+
+def saturate(audio: np.ndarray, amount) -> np.ndarray:
+    out = np.empty_like(audio, dtype=_float_dtype(audio))
+    _saturate_kernel(_flat(audio), amount, _flat(out))
+    return out
+
+
+def fuse(audio: np.ndarray, codes: list, params: list, chunk_size=16384) -> np.ndarray:
+    """
+    Run a list of pointwise ops in a single compiled pass into a float32 buffer.
+
+    Parameters:
+        audio (np.ndarray): Input audio (time on axis 0)
+        codes (list): Op codes (GAIN, BITCRUSH, SATURATE, CLIP)
+        params (list): Parameters of each op (up to two per op)
+        chunk_size (int): Number of values processed per chunk (default: 16384)
+    """
+    table = np.zeros((len(codes), 2), dtype=np.float32)
+    for k, args in enumerate(params):
+        table[k, : len(args)] = args
+    out = np.empty_like(audio, dtype=np.float32)
+    _fuse_kernel(_flat(audio), np.asarray(codes, dtype=np.int64), table, _flat(out), chunk_size)
+    return out
+
+
+def wow_flutter(buffer: np.ndarray, start, phase, omega, lag_scale) -> np.ndarray:
+    """
+    Read buffer[start:] through the flutter delay line with linear interpolation.
+
+    Parameters:
+        buffer (np.ndarray): History followed by the current block (time on axis 0)
+        start (int): Index of the first sample of the current block in the buffer
+        phase (float): Modulation phase at the first sample of the block
+        omega (float): Modulation angular speed (radians per sample)
+        lag_scale (float): depth / omega, half of the maximum lag in samples
+    """
+    shape = (len(buffer) - start,) + buffer.shape[1:]
+    out = np.empty((shape[0], int(np.prod(shape[1:]))), dtype=_float_dtype(buffer))
+    _wow_flutter_kernel(_as_2d(buffer), start, phase, omega, lag_scale, out)
+    return out.reshape(shape)
@@ -0,0 +1,19 @@
+import numpy as np
+
+
+def channel_contiguous(audio: np.ndarray) -> np.ndarray:
+    """
+    Store (n_samples, n_channels) audio channel by channel (Fortran order).
+
+    Filters and FFTs run along the time axis: with this layout every channel is one
+    contiguous run of memory, so scipy can work on it without a strided copy per call.
+    Pointwise effects keep the layout, so the conversion is paid at most once per chain.
+    Mono audio is returned unchanged.
+
+    Parameters:
+        audio (np.ndarray): Audio samples (time on axis 0)
+    """
+    audio = np.asarray(audio)
+    if audio.ndim < 2:
+        return audio
+    return np.asfortranarray(audio)
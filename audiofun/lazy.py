@@ -0,0 +1,54 @@
+import numpy as np
+
+from . import jit
+
+
+# POINTWISE OPS
+# Each op transforms a float32 chunk in place, so that a chain of them can be run
+# chunk by chunk while the chunk is still in cache.
+def gain(chunk, gain_factor):
+    np.multiply(chunk, gain_factor, out=chunk)
+
+
+def bitcrush(chunk, max_val):
+    np.multiply(chunk, max_val, out=chunk)
+    np.round(chunk, out=chunk)
+    np.divide(chunk, max_val, out=chunk)
+
+
+def saturate(chunk, amount):
+    np.multiply(chunk, amount, out=chunk)
+    np.tanh(chunk, out=chunk)
+
+
+def clip(chunk, low, high):
+    np.clip(chunk, low, high, out=chunk)
+
+
+# op codes of the compiled fused kernel
+CODES = {gain: jit.GAIN, bitcrush: jit.BITCRUSH, saturate: jit.SATURATE, clip: jit.CLIP}
+
+
+def fuse(source: np.ndarray, ops: list, chunk_size=16384) -> np.ndarray:
+    """
+    Run a list of pointwise ops over the source in a single pass.
+
+    The result is written into one preallocated float32 buffer; every chunk of the
+    source is copied in once and all ops are applied to it before moving on.
+    With the numba backend the whole chain runs as one compiled per-sample loop instead.
+
+    Parameters:
+        source (np.ndarray): Input audio (time on axis 0)
+        ops (list): List of (op, args) tuples, op being one of the pointwise ops of this module
+        chunk_size (int): Number of samples processed per chunk (default: 16384)
+    """
+    if jit.enabled():
+        return jit.fuse(source, [CODES[op] for op, _ in ops], [args for _, args in ops])
+
+    out = np.empty(np.shape(source), dtype=np.float32)
+    for start in range(0, len(out), chunk_size):
+        chunk = out[start : start + chunk_size]
+        np.copyto(chunk, source[start : start + chunk_size], casting="unsafe")
+        for op, args in ops:
+            op(chunk, *args)
+    return out
@@ -1,27 +1,104 @@
+import os
+from functools import lru_cache
+
 import numpy as np
 from scipy.io import wavfile
-from scipy import stats
+from scipy.signal import lfilter
 
 from typing import Tuple
 
 
+# IIR approximations of the noise colors, applied to white noise
+# pink: -3 dB/octave (Julius O. Smith's 3 pole / 3 zero fit), blue: its inverse (+3 dB/octave),
+# brown: -6 dB/octave, leaky integrator
+_PINK = (
+    np.array([0.049922035, -0.095993537, 0.050612699, -0.004408786]),
+    np.array([1, -2.494956002, 2.017265875, -0.522189400]),
+)
+_NOISE_FILTERS = {
+    "white": None,
+    "pink": _PINK,
+    "blue": (_PINK[1] / _PINK[0][0], _PINK[0] / _PINK[0][0]),
+    "brown": (np.array([1.0]), np.array([1.0, -0.995])),
+}
+
+
+class NoiseGenerator:
+    """
+    Seeded, chunked colored noise generator.
+
+    White gaussian noise is drawn with numpy.random.Generator and shaped by a small IIR
+    filter whose state is carried from chunk to chunk, so any amount of noise can be
+    produced in streaming fashion and the same seed always gives the same stream,
+    whatever the chunk sizes. Output is float32 with unit variance times `amplitude`.
+
+    Parameters:
+        color (str): "white", "pink", "brown" or "blue" (default: "white")
+        seed (int | None): Seed of the random generator (default: None)
+        amplitude (float): Standard deviation of the output (default: 1.0)
+    """
+
+    def __init__(self, color="white", seed=None, amplitude=1.0):
+        if color not in _NOISE_FILTERS:
+            raise ValueError(f"Unknown noise color {color}")
+        self.color = color
+        self.rng = np.random.default_rng(seed)
+        self.filter = _NOISE_FILTERS[color]
+        self.zi = None
+        self.scale = amplitude
+        if self.filter is not None:
+            b, a = self.filter
+            self.zi = np.zeros(max(len(a), len(b)) - 1)
+            # unit variance: divide by the energy of the filter impulse response
+            impulse = np.zeros(2**16)
+            impulse[0] = 1
+            self.scale = amplitude / np.sqrt(np.sum(lfilter(b, a, impulse) ** 2))
+
+
+    def chunk(self, n_samples: int) -> np.ndarray:
+        white = self.rng.standard_normal(n_samples, dtype=np.float32)
+        if self.filter is None:
+            white *= self.scale
+            return white
+        colored, self.zi = lfilter(*self.filter, white, zi=self.zi)
+        return (colored * self.scale).astype(np.float32)
+
+
+    def chunks(self, n_samples: int, chunk_size=65536):
+        """
+        Yield n_samples of noise in chunks of chunk_size samples
+        """
+        for start in range(0, n_samples, chunk_size):
+            yield self.chunk(min(chunk_size, n_samples - start))
+
+
+    def generate(self, length_in_seconds, sample_rate=44100) -> np.ndarray:
+        return self.chunk(int(sample_rate * length_in_seconds))
+
+
 def get_noise(
-    length_in_seconds, sample_rate=44100, amplitude=11
+    length_in_seconds, sample_rate=44100, amplitude=11, seed=None
 ) -> Tuple[int, np.ndarray]:
-    data = (
-        stats.truncnorm(-1, 1, scale=min(2**16, 2**amplitude))
-        .rvs(sample_rate * length_in_seconds)
-        .astype(np.int16)
-    )
-    data_norm: np.ndarray = data / np.max(np.abs(data))
-    return sample_rate, data_norm
-
+    # gaussian truncated to [-1, 1], quantized to 2**amplitude levels like an int16 cast
+    # would, then normalized to the peak: all in place on one buffer
+    rng = np.random.default_rng(seed)
+    n_samples = int(sample_rate * length_in_seconds)
+    data = rng.standard_normal(n_samples)
+    outside = np.flatnonzero(np.abs(data) > 1)
+    while len(outside):
+        data[outside] = rng.standard_normal(len(outside))
+        outside = outside[np.abs(data[outside]) > 1]
 
-def get_impulse_response(ir_path, audio_lenght, ir_right_padding_ms=0):
-    sample_rate, ir = wavfile.read(ir_path)
+    data *= min(2**16, 2**amplitude)
+    np.trunc(data, out=data)
+    data /= np.max(np.abs(data))
+    return sample_rate, data
 
-    # print("ir lenght", len(ir), "audio lenght", audio_lenght)
 
+def prepare_impulse_response(ir: np.ndarray) -> np.ndarray:
+    """
+    Convert an impulse response as read from file to mono float32 in [-1, 1]
+    """
     # Normalize IR to float32 range [-1, 1] if it's integer-encoded
     if np.issubdtype(ir.dtype, np.integer):
         max_val = np.iinfo(ir.dtype).max
@@ -32,24 +109,52 @@ def get_impulse_response(ir_path, audio_lenght, ir_right_padding_ms=0):
     # Convert stereo IR to mono by averaging channels
     if ir.ndim > 1:
         ir = ir.mean(axis=1)
+    return ir
+
+
+def tile_impulse_response(ir: np.ndarray, length: int, padding: int = 0, out=None) -> np.ndarray:
+    """
+    Right pad the impulse response with `padding` zeros and repeat it to fit `length` samples.
 
-    # add padding to ir
-    ir = np.pad(
-        ir,
-        (0, int(ir_right_padding_ms * (10 ** (-3)) * sample_rate)),
-        constant_values=(0),
-    )
-    # print("padded lenght", len(ir))
-
-    if len(ir) > audio_lenght:
-        ir = ir[:audio_lenght]
-    elif len(ir) < audio_lenght:
-        repeats = int(np.ceil(audio_lenght / len(ir)))
-        tiled = np.tile(ir, repeats)
-        i = 0
-        while len(tiled) > audio_lenght:
-            i += 1
-            tiled = np.tile(ir, repeats - i)
-        ir = tiled[:audio_lenght]
+    Only whole repetitions are kept, so the result is shorter than `length` unless it is a
+    multiple of the padded length; an impulse response longer than `length` is truncated.
+    Padding and tiling are written in a single preallocated buffer.
+
+    Parameters:
+        ir (np.ndarray): Impulse response (1-D)
+        length (int): Target length in samples
+        padding (int): Number of zeros appended to the impulse response (default: 0)
+        out (np.ndarray | None): Buffer to write into, at least as long as the result (default: None)
+    """
+    period = len(ir) + padding
+    repeats = max(length // period, 1)
+    size = min(period * repeats, length)
+    if out is None:
+        out = np.zeros(size, dtype=ir.dtype)
+    else:
+        out = out[:size]
+        out[:] = 0
+
+    if period >= length:
+        out[: min(len(ir), size)] = ir[:size]
+    else:
+        out.reshape(repeats, period)[:, : len(ir)] = ir
+    return out
 
+
+@lru_cache(maxsize=64)
+def _load_impulse_response(ir_path, mtime_ns):
+    # keyed by modification time as well, so that an edited file is read again
+    sample_rate, ir = wavfile.read(ir_path, mmap=True)
+    ir = prepare_impulse_response(ir)
+    ir.setflags(write=False)
     return sample_rate, ir
+
+
+def get_impulse_response(ir_path, audio_lenght, ir_right_padding_ms=0):
+    sample_rate, ir = _load_impulse_response(ir_path, os.stat(ir_path).st_mtime_ns)
+
+    # print("ir lenght", len(ir), "audio lenght", audio_lenght)
+
+    padding = int(ir_right_padding_ms * (10 ** (-3)) * sample_rate)
+    return sample_rate, tile_impulse_response(ir, audio_lenght, padding)
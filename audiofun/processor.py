@@ -0,0 +1,14 @@
+import numpy as np
+
+
+# BLOCK PROCESSORS
+# Each processor transforms one block of samples (time on axis 0) and keeps
+# whatever state it needs to continue seamlessly on the next block.
+class BlockProcessor:
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def flush(self):
+        # samples still held by the processor once the input is over
+        return None
@@ -0,0 +1,152 @@
+import functools
+import json
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def _describe(audio):
+    audio = np.asarray(audio) if audio is not None else np.empty(0)
+    return list(audio.shape), int(audio.nbytes)
+
+
+class Profiler:
+    """
+    Records wall time, CPU time, peak allocation and input/output sizes of every profiled
+    AudioFun method call (see AudioFun.enable_profiling).
+
+    In lazy mode the deferred effects cost nothing when called: their fused pass is
+    accounted to the step that first reads the audio.
+
+    Peaks of nested steps are included in the peak of the steps that call them: every
+    step resets the tracemalloc peak, so the peak reached so far by each enclosing step is
+    kept on a stack and merged back when the nested step returns.
+
+    Parameters:
+        callback (Callable | None): Called with the record of each step as soon as it is taken
+        memory (boolean): Trace peak allocations with tracemalloc (default: True)
+    """
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None, memory=True):
+        self.callback = callback
+        self.memory = memory
+        self.steps = []
+        self.depth = 0
+        self._peaks = []
+        self._started_tracing = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+    def call(self, method, instance, args, kwargs):
+        in_shape, in_bytes = _describe(instance._audio)
+        if self.memory:
+            memory_before, peak_before = tracemalloc.get_traced_memory()
+            if self._peaks:
+                # the enclosing step's peak so far, before it is reset
+                self._peaks[-1] = max(self._peaks[-1], peak_before)
+            tracemalloc.reset_peak()
+            self._peaks.append(memory_before)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        self.depth += 1
+        try:
+            result = method(instance, *args, **kwargs)
+        finally:
+            self.depth -= 1
+            if self.memory:
+                absolute_peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], absolute_peak)
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = absolute_peak - memory_before if self.memory else None
+        out_shape, out_bytes = _describe(instance._audio)
+
+        step = {
+            "step": method.__name__,
+            "depth": self.depth,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_alloc_bytes": peak,
+            "in_shape": in_shape,
+            "in_bytes": in_bytes,
+            "out_shape": out_shape,
+            "out_bytes": out_bytes,
+        }
+        self.steps.append(step)
+        if self.callback is not None:
+            self.callback(step)
+        return result
+
+
+    def report(self) -> dict:
+        top = [s for s in self.steps if s["depth"] == 0]
+        peaks = [s["peak_alloc_bytes"] for s in top if s["peak_alloc_bytes"] is not None]
+        return {
+            "steps": list(self.steps),
+            "total": {
+                "wall_s": sum(s["wall_s"] for s in top),
+                "cpu_s": sum(s["cpu_s"] for s in top),
+                "peak_alloc_bytes": max(peaks) if peaks else None,
+            },
+        }
+
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.report(), **kwargs)
+
+
+    def table(self) -> str:
+        report = self.report()
+        rows = [("step", "wall ms", "cpu ms", "peak MB", "in", "out")]
+        for s in report["steps"]:
+            peak = s["peak_alloc_bytes"]
+            rows.append((
+                "  " * s["depth"] + s["step"],
+                f"{s['wall_s'] * 1e3:.2f}",
+                f"{s['cpu_s'] * 1e3:.2f}",
+                "-" if peak is None else f"{peak / 2**20:.2f}",
+                "x".join(map(str, s["in_shape"])),
+                "x".join(map(str, s["out_shape"])),
+            ))
+        total = report["total"]
+        peak = total["peak_alloc_bytes"]
+        rows.append((
+            "total",
+            f"{total['wall_s'] * 1e3:.2f}",
+            f"{total['cpu_s'] * 1e3:.2f}",
+            "-" if peak is None else f"{peak / 2**20:.2f}",
+            "",
+            "",
+        ))
+        widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        lines = [
+            "  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths)))
+            for r in rows
+        ]
+        lines.insert(1, "-" * len(lines[0]))
+        return "\n".join(lines)
+
+
+def profiled(method):
+    """
+    Decorator for AudioFun methods: timed by the instance profiler, if any.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        return self.profiler.call(method, self, args, kwargs)
+    return wrapper
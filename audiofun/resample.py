@@ -0,0 +1,157 @@
+from math import gcd
+
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+try:
+    import soxr
+    SOXR_AVAILABLE = True
+except ImportError:
+    SOXR_AVAILABLE = False
+
+
+def _backend(backend: str) -> str:
+    if backend == "auto":
+        return "soxr" if SOXR_AVAILABLE else "poly"
+    if backend not in ("soxr", "poly"):
+        raise ValueError(f"Unknown resampling backend {backend}")
+    if backend == "soxr" and not SOXR_AVAILABLE:
+        raise ImportError("soxr is not installed")
+    return backend
+
+
+def _ratio(orig_rate: int, new_rate: int):
+    divisor = gcd(int(orig_rate), int(new_rate))
+    return int(new_rate) // divisor, int(orig_rate) // divisor
+
+
+def resample(audio: np.ndarray, orig_rate: int, new_rate: int, backend="auto") -> np.ndarray:
+    """
+    Resample audio (time on axis 0) from one sample rate to another.
+
+    Parameters:
+        audio (np.ndarray): Audio to resample
+        orig_rate (int): Sample rate of the audio
+        new_rate (int): Target sample rate
+        backend (str): "soxr", "poly" (scipy resample_poly) or "auto" (soxr when installed)
+    """
+    if orig_rate == new_rate:
+        return audio
+    if _backend(backend) == "soxr":
+        audio = np.asarray(audio)
+        if audio.dtype not in (np.float32, np.float64, np.int16, np.int32):
+            audio = audio.astype(np.float64)
+        return soxr.resample(np.ascontiguousarray(audio), orig_rate, new_rate)
+    up, down = _ratio(orig_rate, new_rate)
+    return resample_poly(audio, up, down, axis=0)
+
+
+class PolyphaseResampler:
+    """
+    Block by block polyphase resampler (same anti-aliasing filter as scipy resample_poly).
+
+    Output sample m is sum_i h[phase(m) + i * up] * x[j(m) - i], with the filter centred on
+    input time m * down / up. The last taps-per-phase input samples are kept between blocks.
+    """
+
+    def __init__(self, orig_rate: int, new_rate: int):
+        self.up, self.down = _ratio(orig_rate, new_rate)
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+
+        self.taps = int(np.ceil(len(h) / self.up))
+        phases = np.zeros(self.taps * self.up)
+        phases[: len(h)] = h
+        # phases[p, i] = h[p + i * up]
+        self.phases = phases.reshape(self.taps, self.up).T
+        self.delay = half_len
+
+        self.buffer = None
+        self.buffer_start = 0
+        self.received = 0
+        self.produced = 0
+
+
+    def _render(self, stop):
+        # outputs produced .. stop - 1, from the samples in the buffer
+        m = np.arange(self.produced, stop)
+        t = m * self.down + self.delay
+        phase = t % self.up
+        idx = (t // self.up - self.buffer_start)[:, None] - np.arange(self.taps)[None, :]
+        frames = self.buffer[np.clip(idx, 0, len(self.buffer) - 1)]
+        # samples past the end of the buffer (only when flushing) are zero
+        frames[idx >= len(self.buffer)] = 0
+        out = np.einsum("mi,mi...->m...", self.phases[phase], frames)
+        self.produced = stop
+        return out
+
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.buffer is None:
+            # zero history before the first sample
+            self.buffer = np.zeros((self.taps - 1,) + block.shape[1:])
+            self.buffer_start = -(self.taps - 1)
+        self.buffer = np.concatenate([self.buffer, block])
+        self.received += len(block)
+
+        # an output is ready once the newest sample it needs has arrived
+        last_input = self.received - 1
+        stop = max((last_input * self.up - self.delay) // self.down + 1, self.produced)
+        out = self._render(stop)
+
+        keep = (stop * self.down + self.delay) // self.up - self.taps + 1 - self.buffer_start
+        keep = min(max(keep, 0), len(self.buffer))
+        self.buffer = self.buffer[keep:]
+        self.buffer_start += keep
+        return out
+
+
+    def flush(self) -> np.ndarray:
+        if self.buffer is None:
+            return None
+        total = -(-self.received * self.up // self.down)
+        return self._render(max(total, self.produced))
+
+
+class StreamResampler:
+    """
+    Block processor resampling a stream, with the soxr streaming API when available
+    and PolyphaseResampler otherwise. Call `flush` after the last block to get the tail.
+
+    Parameters:
+        orig_rate (int): Sample rate of the input
+        new_rate (int): Target sample rate
+        backend (str): "soxr", "poly" or "auto" (default: "auto")
+    """
+
+    def __init__(self, orig_rate: int, new_rate: int, backend="auto"):
+        self.orig_rate = orig_rate
+        self.new_rate = new_rate
+        self.backend = _backend(backend)
+        self.resampler = None
+        self.dtype = None
+        self.channel_shape = None
+
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.resampler is None:
+            self.channel_shape = block.shape[1:]
+            if self.backend == "soxr":
+                self.dtype = np.float32 if block.dtype == np.float32 else np.float64
+                channels = int(np.prod(self.channel_shape))
+                self.resampler = soxr.ResampleStream(self.orig_rate, self.new_rate, channels, dtype=self.dtype)
+            else:
+                self.resampler = PolyphaseResampler(self.orig_rate, self.new_rate)
+        if self.backend == "soxr":
+            block = np.ascontiguousarray(block, dtype=self.dtype)
+            return self.resampler.resample_chunk(block, last=False)
+        return self.resampler.process(block)
+
+
+    def flush(self) -> np.ndarray:
+        if self.resampler is None:
+            return None
+        if self.backend == "soxr":
+            return self.resampler.resample_chunk(np.zeros((0,) + self.channel_shape, dtype=self.dtype), last=True)
+        return self.resampler.flush()
@@ -0,0 +1,273 @@
+import copy
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import sosfilt
+
+from . import jit
+from .convolution import PartitionedConvolver
+from .filters import design_filter
+from .processor import BlockProcessor
+from .resample import StreamResampler
+
+
+class Gain(BlockProcessor):
+
+    def __init__(self, gain_db: float):
+        self.gain_factor = 10 ** (gain_db / 20)
+
+    def process(self, block):
+        return block * self.gain_factor
+
+
+class Bitcrush(BlockProcessor):
+
+    def __init__(self, bit_depth=4):
+        self.max_val = 2 ** (bit_depth - 1)
+
+    def process(self, block):
+        return np.round(block * self.max_val) / self.max_val
+
+
+class Saturate(BlockProcessor):
+
+    def __init__(self, amount=1.5):
+        self.amount = amount
+
+    def process(self, block):
+        return np.tanh(block * self.amount)
+
+
+class DownsampleRaw(BlockProcessor):
+
+    def __init__(self, factor):
+        self.factor = factor
+        # index of the next kept sample, relative to the start of the next block
+        self.offset = 0
+
+    def process(self, block):
+        out = block[self.offset :: self.factor]
+        self.offset = (self.offset - len(block)) % self.factor
+        return out
+
+
+class Filter(BlockProcessor):
+    """
+    IIR filter in second-order sections whose state (zi) is carried across blocks.
+    """
+
+    def __init__(self, sos):
+        # own writable copy: cached filters are read-only and scipy's sosfilt needs a writable buffer
+        self.sos = np.array(sos)
+        self.zi = None
+
+    def process(self, block):
+        if self.zi is None:
+            self.zi = np.zeros((len(self.sos), 2) + block.shape[1:])
+        out, self.zi = sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return out
+
+
+class WowFlutter(BlockProcessor):
+    """
+    Wow flutter as a modulated delay line.
+
+    The read position lags the write position by
+    lag(n) = depth / w * (1 - cos(w * n)), with w = 2 * pi * speed / sample_rate,
+    so the playback speed swings by +/- depth around 1. The lag is bounded by
+    2 * depth / w samples, which is all the history that has to be kept between blocks.
+    Fractional read positions are linearly interpolated.
+    """
+
+    def __init__(self, depth=0.002, speed=0.5, sample_rate=44100):
+        self.depth = depth
+        self.omega = 2 * np.pi * speed / sample_rate
+        self.lag_scale = depth / self.omega if self.omega > 0 else 0.0
+        self.max_lag = int(np.ceil(2 * self.lag_scale)) + 1
+        self.phase = 0.0
+        self.history = None
+
+    def process(self, block):
+        n = len(block)
+        if self.history is None or len(self.history) == 0:
+            buffer = block
+        else:
+            buffer = np.concatenate([self.history, block])
+        start = len(buffer) - n
+
+        if jit.enabled():
+            out = jit.wow_flutter(buffer, start, self.phase, self.omega, self.lag_scale)
+        else:
+            phase = self.phase + self.omega * np.arange(n)
+            positions = np.maximum(np.arange(start, len(buffer)) - self.lag_scale * (1 - np.cos(phase)), 0)
+            i0 = np.floor(positions).astype(int)
+            i1 = np.minimum(i0 + 1, len(buffer) - 1)
+            frac = (positions - i0).reshape((-1,) + (1,) * (buffer.ndim - 1))
+            out = buffer[i0] * (1 - frac) + buffer[i1] * frac
+
+        self.phase = (self.phase + self.omega * n) % (2 * np.pi)
+        self.history = buffer[max(len(buffer) - self.max_lag, 0) :]
+        return out
+
+
+class AudioFunStream:
+    """
+    Streaming counterpart of AudioFun.
+
+    Effect methods only record the chain; `render` then reads the input file block by block,
+    pushes every block through the chain and writes it to the output file, so peak memory
+    depends on `block_size` and not on the file length. Audio is processed as float32 in [-1, 1].
+
+    Parameters:
+        filename (str): Path of the audio file to read.
+        block_size (int): Number of frames read per block (default: 65536)
+    """
+
+    def __init__(self, filename: str, block_size=65536):
+        self.filename = filename
+        self.block_size = block_size
+        self.sample_rate = sf.info(filename).samplerate
+        self.chain = []
+        self.peak_db = None
+
+
+    def _add(self, processor: BlockProcessor):
+        if self.peak_db is not None:
+            raise ValueError("normalize_to_peak_db must be the last step of a streamed chain")
+        self.chain.append(processor)
+        return self
+
+
+    # EFFECTS
+    def apply_gain_db(self, gain_db: float):
+        return self._add(Gain(gain_db))
+
+
+    def bitcrush(self, bit_depth=4):
+        return self._add(Bitcrush(bit_depth))
+
+
+    def saturate(self, amount=1.5):
+        return self._add(Saturate(amount))
+
+
+    def wow_flutter(self, depth=0.002, speed=0.5):
+        return self._add(WowFlutter(depth, speed, self.sample_rate))
+
+
+    def apply_convolution(self, impulse_response: np.ndarray, partition_size=4096):
+        return self._add(PartitionedConvolver(impulse_response, partition_size))
+
+
+    # SAMPLE RATE
+    def downsample_raw(self, factor):
+        return self._add(DownsampleRaw(factor))
+
+
+    def downsample(self, new_rate, backend="auto"):
+        self._downsampled_rate = new_rate
+        return self._add(StreamResampler(self.sample_rate, new_rate, backend))
+
+
+    def upsample(self, from_rate=None, backend="auto"):
+        if from_rate is None:
+            from_rate = getattr(self, "_downsampled_rate", self.sample_rate)
+        self._downsampled_rate = self.sample_rate
+        return self._add(StreamResampler(from_rate, self.sample_rate, backend))
+
+
+    def resample_to(self, new_rate, backend="auto"):
+        processor = StreamResampler(self.sample_rate, new_rate, backend)
+        self.sample_rate = new_rate
+        return self._add(processor)
+
+
+    # FILTERS
+    def lowpass(self, cutoff=3000, order=4):
+        return self._add(Filter(design_filter("low", order, cutoff, self.sample_rate)))
+
+
+    def highpass(self, cutoff, order=4):
+        return self._add(Filter(design_filter("high", order, cutoff, self.sample_rate)))
+
+
+    def bandpass_filter(self, lowcut=2000, highcut=10000, order=4):
+        return self._add(Filter(design_filter("band", order, (lowcut, highcut), self.sample_rate)))
+
+
+    def normalize_to_peak_db(self, peak_db=-3.0):
+        """
+        Scales the rendered audio so that its peak reaches the target dB level.
+        Needs the peak of the whole output, so it is applied as a second pass over the
+        output file and must be the last step of the chain.
+
+        Parameters:
+            peak_db (float): Target peak in decibels (default: -3 dBFS).
+        """
+        self.peak_db = peak_db
+        return self
+
+
+    # RENDER
+    def _blocks(self):
+        # work on fresh copies so that the recorded chain can be rendered more than once
+        chain = copy.deepcopy(self.chain)
+        with sf.SoundFile(self.filename) as reader:
+            for block in reader.blocks(self.block_size, dtype="float32"):
+                for processor in chain:
+                    block = processor.process(block)
+                yield block
+
+        # the tail of each processor still goes through the rest of the chain;
+        # processors without a flush hold no samples
+        for i, processor in enumerate(chain):
+            flush = getattr(processor, "flush", None)
+            tail = flush() if flush is not None else None
+            if tail is None:
+                continue
+            for following in chain[i + 1 :]:
+                tail = following.process(tail)
+            yield tail
+
+
+    def render(self, filename: str, clip=False, subtype="PCM_16"):
+        """
+        Render the recorded chain to file
+
+        Parameters:
+            filename (str): Name of the file to write.
+            clip (boolean): Clip blocks to [-1, 1] before writing (default: False)
+            subtype (str): soundfile subtype of the output (default: PCM_16)
+        """
+        channels = sf.info(self.filename).channels
+
+        if self.peak_db is None:
+            with sf.SoundFile(filename, "w", self.sample_rate, channels, subtype) as writer:
+                for block in self._blocks():
+                    writer.write(np.clip(block, -1.0, 1.0) if clip else block)
+            return self
+
+        # First pass renders to a float scratch file while tracking the peak,
+        # second pass rescales it into the requested output.
+        fd, scratch = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            current_peak = 0.0
+            with sf.SoundFile(scratch, "w", self.sample_rate, channels, "FLOAT") as writer:
+                for block in self._blocks():
+                    if len(block):
+                        current_peak = max(current_peak, float(np.max(np.abs(block))))
+                    writer.write(block)
+
+            scale = 10 ** (self.peak_db / 20) / current_peak if current_peak > 0 else 1.0
+            with sf.SoundFile(scratch) as reader:
+                with sf.SoundFile(filename, "w", self.sample_rate, channels, subtype) as writer:
+                    for block in reader.blocks(self.block_size, dtype="float32"):
+                        block = block * scale
+                        writer.write(np.clip(block, -1.0, 1.0) if clip else block)
+        finally:
+            os.remove(scratch)
+
+        return self
@@ -0,0 +1,85 @@
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+
+class WavWriter:
+    """
+    Write a WAV file frame block by frame block, with the same layout as scipy.io.wavfile.write.
+    Sizes in the header are patched when the writer is closed.
+
+    Parameters:
+        filename (str): Name of the file to write.
+        sample_rate (int): Sample rate
+        channels (int): Number of channels
+        dtype (np.dtype): Sample type written to disk (int16, int32, uint8, float32, float64...)
+    """
+
+    def __init__(self, filename: str, sample_rate: int, channels: int, dtype):
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.channels = channels
+        self.frames = 0
+
+        kind = self.dtype.kind
+        if not (kind == "i" or kind == "f" or (kind == "u" and self.dtype.itemsize == 1)):
+            raise ValueError(f"Unsupported data type '{self.dtype}'")
+        self.pcm = kind != "f"
+
+        bit_depth = self.dtype.itemsize * 8
+        block_align = channels * self.dtype.itemsize
+        fmt = struct.pack(
+            "<HHIIHH",
+            WAVE_FORMAT_PCM if self.pcm else WAVE_FORMAT_IEEE_FLOAT,
+            channels,
+            sample_rate,
+            sample_rate * block_align,
+            block_align,
+            bit_depth,
+        )
+        if not self.pcm:
+            # add cbSize field for non-PCM files
+            fmt += b"\x00\x00"
+
+        self.file = open(filename, "wb")
+        self.file.write(b"RIFF\x00\x00\x00\x00WAVE")
+        self.file.write(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+        if not self.pcm:
+            self.fact_position = self.file.tell() + 8
+            self.file.write(b"fact" + struct.pack("<II", 4, 0))
+        self.file.write(b"data\x00\x00\x00\x00")
+        self.data_position = self.file.tell()
+
+
+    def write(self, frames: np.ndarray):
+        """
+        Append frames, (n_frames,) or (n_frames, channels), already in the writer dtype.
+        """
+        frames = np.ascontiguousarray(frames, dtype=self.dtype)
+        self.file.write(frames.data)
+        self.frames += len(frames)
+
+
+    def close(self):
+        data_size = self.file.tell() - self.data_position
+        if data_size + self.data_position - 8 > 0xFFFFFFFF:
+            self.file.close()
+            raise ValueError("Data exceeds wave file size limit")
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", data_size + self.data_position - 8))
+        self.file.seek(self.data_position - 4)
+        self.file.write(struct.pack("<I", data_size))
+        if not self.pcm:
+            self.file.seek(self.fact_position)
+            self.file.write(struct.pack("<I", self.frames))
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
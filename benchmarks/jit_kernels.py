@@ -0,0 +1,40 @@
+import time
+import numpy as np
+
+import sys
+sys.path.append("../")
+from audiofun import AudioFun, jit
+
+
+def best_of(function, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+
+    sample_rate = 44100
+    audio = (np.random.default_rng(0).uniform(-1, 1, (sample_rate * 60, 2))).astype(np.float32)
+
+    cases = {
+        "bitcrush": lambda: AudioFun(audio, sample_rate).bitcrush(4),
+        "saturate": lambda: AudioFun(audio, sample_rate).saturate(1.5),
+        "wow_flutter": lambda: AudioFun(audio, sample_rate).wow_flutter(speed=0.1),
+        "lazy chain": lambda: AudioFun(audio, sample_rate, lazy=True)
+            .apply_gain_db(3).bitcrush(4).saturate(1.5).clip(0.9).audio,
+    }
+
+    print(f"{'effect':<14}{'numpy (s)':>12}{'numba (s)':>12}{'speedup':>10}")
+    for name, case in cases.items():
+        jit.set_backend("numpy")
+        numpy_time = best_of(case)
+
+        jit.set_backend("numba")
+        case()  # compile
+        numba_time = best_of(case)
+
+        print(f"{name:<14}{numpy_time:>12.4f}{numba_time:>12.4f}{numpy_time / numba_time:>9.1f}x")
@@ -0,0 +1,47 @@
+import numpy as np
+
+from audiofun import AudioFun, AudioFunBatch
+
+
+def test_reset_restores_lengths_after_resampling():
+    rng = np.random.default_rng(0)
+    clips = [rng.standard_normal(n).astype(np.float32) for n in (1000, 577, 57)]
+    batch = AudioFunBatch(clips, 44100)
+
+    batch.checkpoint()
+    batch.downsample(16000)
+    assert len(batch.audio) < 1000
+
+    batch.reset("default")
+    assert batch.lengths.tolist() == [1000, 577, 57]
+    for clip, original in zip((batch.clip_audio(i) for i in range(len(batch))), clips):
+        np.testing.assert_array_equal(clip, original)
+
+    batch.downsample(16000).reset()
+    assert batch.lengths.tolist() == [1000, 577, 57]
+    assert len(batch.audio) == 1000
+
+
+def test_zero_phase_filter_matches_clips_filtered_alone():
+    rng = np.random.default_rng(1)
+    clips = [rng.standard_normal(n).astype(np.float32) for n in (1000, 577, 577, 300)]
+    clips.append(rng.standard_normal((400, 2)).astype(np.float32))
+    batch = AudioFunBatch(clips, 16000).lowpass(2000, zero_phase=True)
+
+    for i, clip in enumerate(clips):
+        alone = AudioFun(clip, 16000).lowpass(2000, zero_phase=True).audio
+        np.testing.assert_allclose(batch.clip_audio(i), alone, atol=1e-6)
+    assert not batch.audio[577:, 1:4].any() and not batch.audio[400:, 4:].any()
+
+
+def test_normalize_leaves_silent_clips_unchanged():
+    rng = np.random.default_rng(2)
+    clips = [rng.uniform(-0.5, 0.5, 800).astype(np.float32), np.zeros(500, np.float32), rng.uniform(-0.1, 0.1, (300, 2))]
+    with np.errstate(invalid="raise", divide="raise"):
+        batch = AudioFunBatch(clips, 16000).normalize()
+
+    assert batch.audio.dtype == np.int16
+    assert not batch.clip_audio(1).any()
+    for i in (0, 2):
+        expected = AudioFun(clips[i], 16000).normalize().audio
+        np.testing.assert_array_equal(batch.clip_audio(i), expected)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "audio-augmentations"))
+
+from clip_cache import ClipCache
+
+
+def write_clip(path, num_samples, seed=0):
+    audio = np.random.default_rng(seed).uniform(-0.5, 0.5, num_samples).astype(np.float32)
+    sf.write(path, audio, 16000, subtype="FLOAT")
+    return str(path), audio
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int16"])
+def test_put_and_get(tmp_path, dtype):
+    clips = dict(write_clip(tmp_path / f"{i}.wav", n, seed=i) for i, n in enumerate((1600, 800, 0)))
+    cache = ClipCache(str(tmp_path / "cache"), dtype=dtype, processes=1)
+    cache.materialise(list(clips))
+
+    reopened = ClipCache(str(tmp_path / "cache"), dtype=dtype, processes=1)
+    for path, audio in clips.items():
+        assert path in reopened
+        stored = reopened[path]
+        assert stored.dtype == np.dtype(dtype) and not stored.flags.writeable
+        np.testing.assert_allclose(reopened.get_audio(path), audio, atol=1e-4 if dtype == "int16" else 0)
+
+
+def test_changed_clips_replace_their_entry(tmp_path):
+    path, _ = write_clip(tmp_path / "a.wav", 1000)
+    other, other_audio = write_clip(tmp_path / "b.wav", 500, seed=1)
+    cache = ClipCache(str(tmp_path / "cache"), processes=1)
+    cache.materialise([path, other])
+
+    path, audio = write_clip(tmp_path / "a.wav", 1200, seed=2)
+    bump_mtime(path)
+    cache.materialise([path, other])
+    np.testing.assert_array_equal(cache[path], audio)
+    np.testing.assert_array_equal(cache[other], other_audio)
+
+
+def test_compaction_drops_superseded_samples(tmp_path):
+    path, _ = write_clip(tmp_path / "a.wav", 1000)
+    other, other_audio = write_clip(tmp_path / "b.wav", 3000, seed=1)
+    cache = ClipCache(str(tmp_path / "cache"), processes=1)
+    cache.materialise([other, path])
+
+    for seed in range(2, 6):
+        path, audio = write_clip(tmp_path / "a.wav", 1000, seed=seed)
+        bump_mtime(path)
+        cache.materialise([path])
+    live = 1000 + 3000
+    assert os.path.getsize(cache.blob_path) // 4 <= 2 * live
+
+    cache.compact()
+    assert os.path.getsize(cache.blob_path) // 4 == live
+    np.testing.assert_array_equal(cache[path], audio)
+    np.testing.assert_array_equal(cache[other], other_audio)
+
+
+def test_compaction_of_empty_clips(tmp_path):
+    empty, _ = write_clip(tmp_path / "empty.wav", 0)
+    cache = ClipCache(str(tmp_path / "cache"), processes=1)
+    cache.compact()
+    cache.materialise([empty])
+
+    cache.compact()
+    assert os.path.getsize(cache.blob_path) == 0
+    assert len(cache[empty]) == 0
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from scipy.signal import fftconvolve
+
+from audiofun.convolution import PartitionedConvolver, partitioned_convolve
+from audiofun.processor import BlockProcessor
+
+
+@pytest.mark.parametrize("partition_size", [64, 256, 1024])
+@pytest.mark.parametrize("block_size", [17, 100, 999, 5000])
+def test_blocks_match_full_convolution(partition_size, block_size):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal((5000, 2))
+    impulse_response = rng.standard_normal(700) * np.exp(-np.arange(700) / 150)
+    expected = np.stack([fftconvolve(audio[:, c], impulse_response)[: len(audio)] for c in range(2)], axis=1)
+
+    convolver = PartitionedConvolver(impulse_response, partition_size)
+    assert isinstance(convolver, BlockProcessor)
+    out = np.concatenate([convolver.process(audio[i : i + block_size]) for i in range(0, len(audio), block_size)])
+    assert convolver.flush() is None
+    np.testing.assert_allclose(out, expected, atol=1e-9)
+
+    np.testing.assert_allclose(partitioned_convolve(audio, impulse_response, partition_size), expected, atol=1e-9)
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "audio-augmentations"))
+
+audiomentations = pytest.importorskip("audiomentations")
+
+from general_augmentation import GeneralAugmentation
+
+
+def make_augmenter():
+    augment = audiomentations.Compose(
+        [
+            audiomentations.Gain(min_gain_db=-6, max_gain_db=6, p=1.0),
+            audiomentations.OneOf(
+                [
+                    audiomentations.AddColorNoise(min_snr_db=10, max_snr_db=30, p=1.0),
+                    audiomentations.Shift(min_shift=-0.2, max_shift=0.2, p=1.0),
+                ]
+            ),
+            audiomentations.BandPassFilter(p=1.0),
+            audiomentations.Normalize(p=1.0),
+        ]
+    )
+    return GeneralAugmentation(augment, augmentation_duration_s=0.5, min_jitter_s=0.01, max_jitter_s=0.02)
+
+
+def test_augment_batch_matches_augment_clip():
+    rng = np.random.default_rng(0)
+    clips = [rng.uniform(-0.5, 0.5, n).astype(np.float32) for n in (4000, 8000, 12000)]
+    augmenter = make_augmenter()
+    assert augmenter.batch_augmenter.sample_rate == augmenter.sample_rate
+
+    np.random.seed(0)
+    single = [augmenter.augment_clip(clip) for clip in clips]
+    batch, batch_parameters = augmenter.augment_batch(clips, seed=0)
+
+    assert batch.shape == (len(clips), augmenter.augmented_samples)
+    assert len(batch_parameters) == len(clips)
+    for (audio, parameters), row, row_parameters in zip(single, batch, batch_parameters):
+        assert audio.shape == row.shape
+        assert [name for name, _ in parameters] == [name for name, _ in row_parameters]
+        for (name, params), (_, row_params) in zip(parameters, row_parameters):
+            if isinstance(params, list):
+                assert [n for n, _ in params] == [n for n, _ in row_params]
+            elif params.get("should_apply"):
+                assert set(params) == set(row_params), name
+
+    # the batch augmenter is built once and reseeded
+    first = augmenter.batch_augmenter
+    augmenter.augment_batch(clips, seed=1)
+    assert augmenter.batch_augmenter is first
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from audiofun import AudioFun, jit
+
+pytest.importorskip("numba")
+
+
+@pytest.fixture
+def numba_backend():
+    jit.set_backend("numba")
+    yield
+    jit.set_backend("numpy")
+
+
+def test_default_backend_is_numpy():
+    assert jit.get_backend() == "numpy"
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_numba_matches_numpy(numba_backend, dtype):
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-1, 1, (20000, 2)).astype(dtype)
+    audio[:10] *= 50
+    chains = {
+        "bitcrush": lambda fun: fun.bitcrush(4),
+        "saturate": lambda fun: fun.saturate(3.0),
+        "wow_flutter": lambda fun: fun.wow_flutter(speed=2.0),
+        "lazy chain": lambda fun: fun.apply_gain_db(3).bitcrush(6).saturate(1.5).clip(0.9),
+    }
+    for name, chain in chains.items():
+        lazy = name == "lazy chain"
+        compiled = chain(AudioFun(audio, 16000, lazy)).audio
+        jit.set_backend("numpy")
+        expected = chain(AudioFun(audio, 16000, lazy)).audio
+        jit.set_backend("numba")
+        np.testing.assert_allclose(compiled, expected, atol=1e-6, err_msg=name)
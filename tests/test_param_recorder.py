@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "audio-augmentations"))
+
+from param_recorder import ParameterRecorder
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_columns_are_promoted(tmp_path):
+    path = str(tmp_path / "parameters.jsonl")
+    values = [3, 0.5, "loud", None, [1, 2]]
+    with ParameterRecorder(path, chunk_size=4) as recorder:
+        for i, value in enumerate(values):
+            gain = {"should_apply": True, "gain": value} if value is not None else {"should_apply": False}
+            recorder.record([("Gain", gain)], repetition=i)
+            if i == 0:
+                assert recorder.columns["0.Gain.gain"].values.dtype == np.int64
+            elif i == 1:
+                assert recorder.columns["0.Gain.gain"].values.dtype == np.float64
+            elif i == 2:
+                assert recorder.columns["0.Gain.gain"].values.dtype == object
+
+    rows = read_jsonl(path)
+    assert [row["repetition"] for row in rows] == list(range(5))
+    gains = [row.get("0.Gain.gain") for row in rows]
+    assert gains == [3.0, 0.5, "loud", None, [1, 2]]
+    assert isinstance(gains[0], float)
+    # transforms that were not applied only record the flag
+    assert rows[3]["0.Gain.should_apply"] is False and "0.Gain.gain" not in rows[3]
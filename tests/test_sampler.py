@@ -0,0 +1,20 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "audio-augmentations"))
+
+from sampler import ClipSampler
+
+
+def test_zero_weight_clips_are_never_drawn():
+    weights = np.array([0.0, 1.0, 0.0, 2.0, 0.5, 0.0])
+    sampler = ClipSampler(len(weights), seed=0, weights=weights)
+
+    for epoch in range(20):
+        indices = sampler.epoch(epoch)
+        assert sorted(indices.tolist()) == [1, 3, 4]
+
+    shards = [ClipSampler(len(weights), seed=0, shard_index=i, num_shards=2, weights=weights).epoch(3) for i in range(2)]
+    assert sorted(np.concatenate(shards).tolist()) == [1, 3, 4]
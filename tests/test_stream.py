@@ -0,0 +1,19 @@
+import numpy as np
+import soundfile as sf
+
+from audiofun import AudioFun
+
+
+def test_streamed_convolution_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = (0.1 * rng.standard_normal((20000, 2))).astype(np.float32)
+    impulse_response = rng.standard_normal(3000) * np.exp(-np.arange(3000) / 500) * 0.05
+    source, output = tmp_path / "in.wav", tmp_path / "out.wav"
+    sf.write(source, audio, 16000, subtype="FLOAT")
+
+    AudioFun.stream(str(source), 4096).apply_convolution(impulse_response, 1024).lowpass(3000).render(str(output), subtype="FLOAT")
+    streamed, sample_rate = sf.read(output, dtype="float32")
+
+    expected = AudioFun(audio.astype(np.float64), 16000).apply_convolution(impulse_response).lowpass(3000).audio
+    assert sample_rate == 16000 and streamed.shape == audio.shape
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)